@@ -12,9 +12,8 @@ from src.agents.video_agent import create_video_editing_agent
 def setup_langsmith_tracing():
     """Setup LangSmith tracing configuration"""
     
-    # Set environment variables for LangSmith
-    os.environ["LANGCHAIN_TRACING_V2"] = "true"
-    os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
+    # The agent sends traces to this project through its own tracer, so no
+    # process-wide LANGCHAIN_* environment variables are needed
     
     # You can set these via environment variables or pass them directly
     langsmith_api_key = os.getenv("LANGSMITH_API_KEY")
@@ -25,9 +24,6 @@ def setup_langsmith_tracing():
         print("   Set it with: export LANGSMITH_API_KEY='your-api-key'")
         return None, None
     
-    os.environ["LANGCHAIN_API_KEY"] = langsmith_api_key
-    os.environ["LANGCHAIN_PROJECT"] = langsmith_project
-    
     print(f"🔍 LangSmith tracing enabled for project: {langsmith_project}")
     return langsmith_api_key, langsmith_project
 
@@ -2,12 +2,20 @@
 Video Editing Agent - Main Interface
 """
 
+import argparse
+import asyncio
+import contextlib
+import json
 import os
 import sys
 from typing import Optional
 from src.agents.video_agent import create_video_editing_agent
 
 
+# Commands that end the interactive session
+_QUIT_COMMANDS = frozenset({"quit", "exit"})
+
+
 def get_openai_api_key() -> str:
     """Get OpenAI API key from environment or user input"""
     api_key = os.getenv("OPENAI_API_KEY")
@@ -79,9 +87,9 @@ def print_help():
     print("• Type 'clear' to clear the conversation")
 
 
-def print_history(agent, thread_id: str):
+async def print_history(agent, thread_id: str):
     """Print conversation history"""
-    history = agent.get_conversation_history(thread_id)
+    history = await agent.aget_conversation_history(thread_id)
     
     if not history:
         print("No conversation history found.")
@@ -96,7 +104,101 @@ def print_history(agent, thread_id: str):
         print(f"{i}. {msg_type}: {content}")
 
 
-def main():
+async def stream_response(agent, user_input: str, video_uri: str, thread_id: str) -> dict:
+    """Stream the agent's response to the terminal and return the final result"""
+    result = {}
+    replying = False
+    
+    async for event in agent.astream_request(user_input=user_input, video_uri=video_uri, thread_id=thread_id):
+        if event["type"] == "llm_token":
+            if not replying:
+                print("\n✅ Response:")
+                replying = True
+            print(event["data"], end="", flush=True)
+        elif event["type"] == "tool_start":
+            print(f"\n🛠️  Running {event['name']}...", flush=True)
+        elif event["type"] == "tool_end":
+            print(f"   ✔ {event['name']} finished", flush=True)
+            replying = False
+        elif event["type"] == "final":
+            result = event["data"]
+    
+    if replying:
+        print()
+    return result
+
+
+async def _show_help(agent, thread_id: str) -> str:
+    """Handle the 'help' command"""
+    print_help()
+    return thread_id
+
+
+async def _show_history(agent, thread_id: str) -> str:
+    """Handle the 'history' command"""
+    await print_history(agent, thread_id)
+    return thread_id
+
+
+async def _clear_session(agent, thread_id: str) -> str:
+    """Handle the 'clear' command by switching to a new thread for a fresh conversation"""
+    print("🧹 Conversation cleared. Starting fresh session.")
+    return f"session_{len(thread_id)}"
+
+
+# Special commands, each taking (agent, thread_id) and returning the thread_id to continue with
+_COMMANDS = {
+    "help": _show_help,
+    "history": _show_history,
+    "clear": _clear_session,
+}
+
+
+async def run_batch(batch_file: str, max_concurrency: int, rate_limit_per_min: Optional[int]) -> int:
+    """Run every request in a JSONL file through the agent and print one JSON result per line
+    
+    Each line is an object with ``user_input`` and optional ``video_uri`` and ``thread_id``.
+    Returns the process exit code: 0 if every request succeeded, 1 otherwise.
+    """
+    with open(batch_file) as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    
+    # Keep stdout clean for the JSONL results
+    with contextlib.redirect_stdout(sys.stderr):
+        agent = create_video_editing_agent(
+            langsmith_api_key=os.getenv("LANGSMITH_API_KEY"),
+            langsmith_project=os.getenv("LANGSMITH_PROJECT", "video-editing-agent")
+        )
+    
+    results = await agent.aprocess_batch(
+        requests,
+        max_concurrency=max_concurrency,
+        rate_limit_per_min=rate_limit_per_min
+    )
+    
+    for request, result in zip(requests, results):
+        print(json.dumps({
+            "user_input": request["user_input"],
+            "video_uri": result["current_video_uri"],
+            "final_output": result["final_output"],
+            "success": result["success"]
+        }))
+    
+    return 0 if all(result["success"] for result in results) else 1
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AI-powered video editing agent")
+    parser.add_argument("--batch-file", help="JSONL file of requests to process non-interactively")
+    parser.add_argument("--max-concurrency", type=int, default=8,
+                        help="Requests processed at once in batch mode (default: 8)")
+    parser.add_argument("--rate-limit-per-min", type=int, default=None,
+                        help="Cap on LLM calls per minute in batch mode")
+    return parser.parse_args(argv)
+
+
+async def main():
     """Main function to run the video editing agent"""
     print_welcome()
     
@@ -134,19 +236,13 @@ def main():
                 continue
             
             # Handle special commands
-            if user_input.lower() in ['quit', 'exit']:
+            command = user_input.lower()
+            if command in _QUIT_COMMANDS:
                 print("👋 Goodbye!")
                 break
-            elif user_input.lower() == 'help':
-                print_help()
-                continue
-            elif user_input.lower() == 'history':
-                print_history(agent, thread_id)
-                continue
-            elif user_input.lower() == 'clear':
-                # Create a new thread for fresh conversation
-                thread_id = f"session_{len(thread_id)}"
-                print("🧹 Conversation cleared. Starting fresh session.")
+            handler = _COMMANDS.get(command)
+            if handler is not None:
+                thread_id = await handler(agent, thread_id)
                 continue
             
             # Process the video editing request
@@ -160,16 +256,9 @@ def main():
             else:
                 print(f"   Using video: {video_uri}")
             
-            result = agent.process_request(
-                user_input=user_input,
-                video_uri=video_uri,
-                thread_id=thread_id
-            )
+            result = await stream_response(agent, user_input, video_uri, thread_id)
             
-            if result["success"]:
-                print("\n✅ Response:")
-                print(result["final_output"])
-            else:
+            if not result.get("success"):
                 print("\n❌ Error processing request")
                 
         except KeyboardInterrupt:
@@ -181,4 +270,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.batch_file:
+        sys.exit(asyncio.run(run_batch(args.batch_file, args.max_concurrency, args.rate_limit_per_min)))
+    asyncio.run(main())
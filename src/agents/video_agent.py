@@ -2,19 +2,111 @@
 Video Editing Agent using LangGraph ReAct Pattern
 """
 
+import asyncio
+import atexit
+import contextlib
+import functools
+import logging
 import os
-from typing import Dict, List, Any, Optional, Sequence, Annotated
+import sys
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, List, Any, AsyncIterator, NamedTuple, Optional, Sequence, Annotated
+import httpx
+import orjson
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, END, add_messages
-from langgraph.prebuilt import ToolNode
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage, BaseMessage
-from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
-from pydantic import BaseModel, Field
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import RunnableConfig
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from src.tools import tools
-import langsmith
-from langsmith import traceable
+from src.tools.plan import aflush_plan, planning
+
+logger = logging.getLogger(__name__)
+
+# Blocking wrappers run on one long-lived background loop rather than a fresh
+# asyncio.run() loop per call, so that loop's pooled connections stay warm
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _run_sync(coro: Any) -> Any:
+    """Run a coroutine to completion on the shared background loop and return its result"""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="video-agent-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
+
+# Process-wide cap on tools running at once, so a turn with many tool calls cannot
+# launch an unbounded number of ffmpeg processes or S3 transfers
+_TOOL_CONCURRENCY = int(os.getenv("VIDEO_TOOL_CONCURRENCY", os.cpu_count() or 4))
+
+# Pooled HTTP/2 clients shared by every agent, so concurrent requests multiplex over
+# warm connections instead of each agent opening its own. Pooled connections belong
+# to the loop that opened them, so there is one client per loop. An open client's
+# transports reference its loop, so entries are dropped explicitly rather than held
+# weakly: the background loop's at exit, any other loop's by VideoEditingAgent.aclose().
+_http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def _http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _http_clients[loop] = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=256, max_keepalive_connections=64),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+    return client
+
+
+async def _aclose_http_client() -> None:
+    """Close and forget the running loop's shared HTTP client, if it has one"""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# asyncio.Semaphore binds to a single event loop, so keep one per loop
+_tool_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _tool_semaphore() -> asyncio.Semaphore:
+    """Return the tool concurrency semaphore for the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _tool_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _tool_semaphores[loop] = asyncio.Semaphore(_TOOL_CONCURRENCY)
+    return semaphore
+
+
+@atexit.register
+def _close_shared_http_client() -> None:
+    """Close the background loop's HTTP client when the interpreter exits
+
+    Clients of caller-owned loops must be closed with VideoEditingAgent.aclose() while
+    their loop still runs; only the background loop is still running at exit.
+    """
+    client = _http_clients.get(_sync_loop) if _sync_loop is not None else None
+    if client is None or client.is_closed:
+        return
+    try:
+        _run_sync(client.aclose())
+    except Exception as e:
+        logger.debug("Error closing shared HTTP client: %s", e)
 
 
 class AgentState(TypedDict):
@@ -23,12 +115,157 @@ class AgentState(TypedDict):
     current_video_uri: Optional[str]
 
 
+class _StaticAgentState(NamedTuple):
+    """The parts of an agent that are identical for every instance"""
+    tools: tuple
+    tool_map: Mapping[str, Any]
+    tool_schemas: tuple
+
+
+@functools.lru_cache(maxsize=1)
+def _build_static_agent_state() -> _StaticAgentState:
+    """Wrap the tools from tools.py and convert them to OpenAI schemas, once per process"""
+    registered = tuple(tool(_json_tool(func)) for func in tools.TOOLS)
+    return _StaticAgentState(
+        tools=registered,
+        tool_map=MappingProxyType({t.name: t for t in registered}),
+        tool_schemas=tuple(convert_to_openai_tool(t) for t in registered)
+    )
+
+# The static part of the system prompt comes first and the video URI last, so the
+# prefix is byte-identical across calls and eligible for OpenAI prompt caching
+_SYSTEM_PROMPT_PREFIX = """
+You are a professional video editing assistant. Edit videos by calling the provided video editing tools.
+
+For each request, decide which tools are needed and call them with correct parameters. Call independent operations together; for dependent ones, wait for each result and pass its output URI to the next call. Then tell the user what was done.
+
+Always use the CURRENT VIDEO URI below as the input video. If none is provided, or the request is ambiguous or missing required parameters, ask the user.
+
+CURRENT VIDEO URI: """
+_SYSTEM_PROMPT_SUFFIX = "\n"
+
+
+@functools.lru_cache(maxsize=256)
+def _system_message_for(video_uri: str) -> SystemMessage:
+    """Build the system message for a video URI, reusing it for repeat URIs"""
+    return SystemMessage(content=_SYSTEM_PROMPT_PREFIX + video_uri + _SYSTEM_PROMPT_SUFFIX)
+
+# Upper bound on remembered tool results used for speculative planning
+_MAX_PREDICTED_TOOL_RESULTS = 1024
+
+# Number of formatted conversation histories kept per agent
+_HISTORY_CACHE_SIZE = 128
+
+
+def _json_default(obj: Any) -> Any:
+    """Convert values orjson cannot serialize natively, such as read-only mappings"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _tool_content(output: Any) -> str:
+    """Serialize a tool's return value into ToolMessage content"""
+    if isinstance(output, str):
+        return output
+    try:
+        return orjson.dumps(
+            output,
+            default=_json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    except TypeError:
+        return str(output)
+
+
+def _json_tool(func: Any) -> Any:
+    """Make a tool return its result as JSON text
+    
+    The tools return shared read-only mappings, which tracers and tool_end stream
+    events can't serialize, so results are converted once where LangChain sees them.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _tool_content(func(*args, **kwargs))
+    return wrapper
+
+
+def _tool_call_key(tool_call: Dict) -> str:
+    """Key identifying a tool call by name and arguments"""
+    return tool_call["name"] + orjson.dumps(tool_call["args"], option=orjson.OPT_SORT_KEYS, default=str).decode()
+
+
+# Type tags shared by every history entry
+_HUMAN = sys.intern("human")
+_AI = sys.intern("ai")
+_TOOL = sys.intern("tool")
+
+
+def _format_human_message(msg: HumanMessage) -> Dict:
+    """Format a user message for conversation history"""
+    return {
+        "type": _HUMAN,
+        "content": msg.content,
+        "timestamp": getattr(msg, "timestamp", None)
+    }
+
+
+def _format_ai_message(msg: AIMessage) -> Optional[Dict]:
+    """Format an agent message for conversation history, including any tool calls"""
+    content = msg.content
+    tool_calls = msg.tool_calls
+    if tool_calls:
+        content = f"{content or ''} [Called tools: {', '.join(tc['name'] for tc in tool_calls)}]"
+    if not content:
+        return None
+    return {
+        "type": _AI,
+        "content": content,
+        "timestamp": getattr(msg, "timestamp", None)
+    }
+
+
+def _format_tool_message(msg: ToolMessage) -> Dict:
+    """Format a tool result for conversation history"""
+    return {
+        "type": _TOOL,
+        "content": msg.content,
+        "tool_call_id": msg.tool_call_id,
+        "timestamp": getattr(msg, "timestamp", None)
+    }
+
+
+# History formatters keyed by exact message class
+_HISTORY_FORMATTERS = {
+    HumanMessage: _format_human_message,
+    AIMessage: _format_ai_message,
+    ToolMessage: _format_tool_message,
+}
+
+
 class VideoEditingAgent:
     """Video Editing Agent using LangGraph ReAct pattern"""
     
     def __init__(self, openai_api_key: str = None, langsmith_api_key: str = None, 
-                 langsmith_project: str = "video-editing-agent"):
-        """Initialize the video editing agent"""
+                 langsmith_project: str = "video-editing-agent", speculative: bool = False,
+                 checkpointer: Optional[BaseCheckpointSaver] = None, deferred: bool = False):
+        """Initialize the video editing agent
+        
+        ``checkpointer`` stores conversation state and defaults to an in-process
+        MemorySaver. Pass a durable saver (e.g. AsyncSqliteSaver, see
+        ``acreate_video_editing_agent``) to bound memory and share state across workers.
+        
+        With ``speculative=True`` the next LLM turn is started while tools are still
+        running, assuming each tool returns what it returned last time for the same
+        arguments. The speculative response is used only if that assumption holds.
+        
+        With ``deferred=True`` the tool calls of a request are recorded into a plan
+        (see ``src.tools.plan``) instead of running one at a time, and the plan is
+        compiled and run once the agent has finished. The result then carries an
+        ``"outputs"`` dict mapping the ``pending://`` handles the tools returned to the
+        files written. Applies to aprocess_request and astream_request; batches still
+        run tools immediately.
+        """
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if not self.openai_api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass it directly.")
@@ -37,79 +274,92 @@ class VideoEditingAgent:
         self.langsmith_api_key = langsmith_api_key or os.getenv("LANGSMITH_API_KEY")
         self.langsmith_project = langsmith_project or os.getenv("LANGSMITH_PROJECT", "video-editing-agent")
         
+        # Tracing is configured per agent through a callback rather than process-wide
+        # environment variables, so agents tracing to different projects can coexist
+        self._tracer = None
         if self.langsmith_api_key:
-            os.environ["LANGCHAIN_TRACING_V2"] = "true"
-            os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
-            os.environ["LANGCHAIN_API_KEY"] = self.langsmith_api_key
-            os.environ["LANGCHAIN_PROJECT"] = self.langsmith_project
+            # langsmith is only imported when tracing is on
+            import langsmith
+            from langchain_core.tracers import LangChainTracer
+            self._tracer = LangChainTracer(
+                project_name=self.langsmith_project,
+                client=langsmith.Client(api_key=self.langsmith_api_key)
+            )
             print(f"🔍 LangSmith tracing enabled for project: {self.langsmith_project}")
         else:
             print("⚠️  LangSmith API key not provided. Tracing disabled.")
         
-        # Initialize the LLM
-        self.llm = ChatOpenAI(
+        # Initialize the LLM (imported here to keep module import cheap). The client is
+        # created per event loop, see llm_with_tools
+        from langchain_openai import ChatOpenAI
+        self._llm_factory = functools.partial(
+            ChatOpenAI,
             model="gpt-4o",
             api_key=self.openai_api_key,
             temperature=0.2
         )
 
         # Memory for conversation history
-        self.memory = MemorySaver()
+        self.memory = checkpointer if checkpointer is not None else MemorySaver()
         
-        # Register all video editing tools
-        self.tools = self._register_tools()
+        # Connections opened on the agent's behalf, released by aclose()
+        self._owned_connections: List[Any] = []
         
-        # Bind tools to LLM
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
+        # Register all video editing tools. The tools, their lookup table and their
+        # OpenAI schemas are shared by every agent, so only the first agent builds them
+        static = _build_static_agent_state()
+        self.tools = static.tools
+        self._tool_map = static.tool_map
         
-        # Create tool node
-        self.tool_node = ToolNode(self.tools)
+        # Tool-bound LLMs per event loop with the HTTP client each was built on, created
+        # on first use in each loop and dropped by aclose()
+        self._tool_schemas = static.tool_schemas
+        self._llms: Dict[asyncio.AbstractEventLoop, tuple] = {}
+        self._pinned_llm = None
+        
+        # Speculative planning state: last result per tool call, and in-flight
+        # next-turn LLM calls per thread keyed by the tool call they follow
+        self.speculative = speculative
+        self.deferred = deferred
+        self._predicted_tool_results: Dict[str, str] = {}
+        self._speculations: Dict[str, tuple] = {}
+        
+        # Formatted histories keyed by (thread_id, checkpoint_id), oldest first
+        self._history_cache: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
         
         # Create the graph
         self.graph = self._create_graph()
         
-    def _register_tools(self) -> List:
-        """Register all video editing tools from tools.py"""
-        registered_tools = []
-        
-        # Get all functions from tools module
-        tool_functions = [
-            tools.trim_video,
-            tools.split_video,
-            tools.merge_clips,
-            tools.crop_frame,
-            tools.resize_video,
-            tools.change_resolution,
-            tools.adjust_frame_rate,
-            tools.color_correct,
-            tools.add_transition,
-            tools.add_overlay,
-            tools.add_subtitles,
-            tools.add_captions,
-            tools.add_soundtrack,
-            tools.adjust_volume,
-            tools.remove_background_noise,
-            tools.generate_thumbnail,
-            tools.add_intro,
-            tools.add_outro,
-            tools.export_video,
-            tools.change_format
-        ]
-        
-        # Convert functions to LangChain tools
-        for func in tool_functions:
-            tool_wrapper = tool(func)
-            registered_tools.append(tool_wrapper)
+    @property
+    def llm_with_tools(self) -> Any:
+        """The tool-bound LLM for the running event loop
         
-        return registered_tools
+        Its HTTP client comes from the loop's shared pool, so the same agent can be
+        used from the blocking wrappers and from any loop of the caller's, provided
+        aclose() is awaited on that loop before it ends. The LLM is rebuilt if another
+        agent's aclose() closed the client it was using. Assigning a runnable pins it
+        for every loop, e.g. a stub in tests.
+        """
+        if self._pinned_llm is not None:
+            return self._pinned_llm
+        loop = asyncio.get_running_loop()
+        client = _http_client()
+        cached = self._llms.get(loop)
+        if cached is None or cached[0] is not client:
+            cached = self._llms[loop] = (client, self._llm_factory(http_async_client=client).bind_tools(self._tool_schemas))
+        return cached[1]
+    
+    @llm_with_tools.setter
+    def llm_with_tools(self, runnable: Any) -> None:
+        self._pinned_llm = runnable
     
     def _create_graph(self) -> StateGraph:
         """Create the LangGraph workflow"""
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("agent", self._call_agent)
-        workflow.add_node("tools", self.tool_node)  # ToolNode handles the state directly
+        workflow.add_node("agent", self._acall_agent)
+        workflow.add_node("tools", self._aexecute_tools)
         
         # Add edges
         workflow.set_entry_point("agent")
@@ -128,106 +378,178 @@ class VideoEditingAgent:
     
     def _create_system_message(self, video_uri: str) -> SystemMessage:
         """Create the system message with current video URI"""
-        return SystemMessage(content=f"""
-You are a professional video editing assistant. You can help users edit videos by calling various video editing tools.
-
-CURRENT VIDEO URI: {video_uri}
-
-Available tools:
-- trim_video: Trim video between start and end times
-- split_video: Split video into two clips at a specific time
-- merge_clips: Merge two video clips sequentially
-- crop_frame: Crop video frame to specific region
-- resize_video: Resize video to target dimensions
-- change_resolution: Change video resolution
-- adjust_frame_rate: Adjust video frame rate
-- color_correct: Apply color correction (brightness, contrast, saturation)
-- add_transition: Add transition effects between clips
-- add_overlay: Overlay image on video
-- add_subtitles: Add subtitle file to video
-- add_captions: Add custom text captions
-- add_soundtrack: Add audio soundtrack
-- adjust_volume: Adjust video audio volume
-- remove_background_noise: Remove noise from audio
-- generate_thumbnail: Generate thumbnail from video
-- add_intro: Add intro clip before main video
-- add_outro: Add outro clip after main video
-- export_video: Export video to specific format
-- change_format: Change video file format
-
-When a user provides a video editing request:
-1. Analyze what they want to do
-2. Use the CURRENT VIDEO URI provided above for all tool calls
-3. Determine which tools to use
-4. Call the appropriate tools with correct parameters (including the video URI)
-5. If multiple operations are needed, call them in sequence
-6. Provide clear feedback about what was done
-
-IMPORTANT: Always use the CURRENT VIDEO URI provided above when calling tools. If no video URI is provided, ask the user to provide one.
-
-Always ask for clarification if the request is ambiguous or missing required parameters.
-""")
-    
-    @traceable(name="video_agent_call")
-    def _call_agent(self, state: AgentState) -> Dict:
-        """Call the agent to process the current state"""
+        return _system_message_for(video_uri)
+    
+    def _build_llm_messages(self, state: AgentState) -> List[BaseMessage]:
+        """Build the message list sent to the LLM for the given state"""
         # Get current video URI from state (now using dict access)
         current_video_uri = state.get("current_video_uri") or "No video URI provided"
         
         # Create system message
         system_message = self._create_system_message(current_video_uri)
         
-        # Prepare messages for LLM
-        messages_for_llm = [system_message]
-        
-        # Add all non-system messages from state
-        for msg in state["messages"]:
-            if not isinstance(msg, SystemMessage):
-                messages_for_llm.append(msg)
-        
-        # Debug: Print message types before calling LLM
-        print(f"Calling LLM with {len(messages_for_llm)} messages:")
-        for i, msg in enumerate(messages_for_llm):
-            msg_type = type(msg).__name__
-            if isinstance(msg, ToolMessage):
-                print(f"  [{i}] {msg_type}: tool_call_id={msg.tool_call_id}")
-            elif isinstance(msg, AIMessage) and hasattr(msg, 'tool_calls') and msg.tool_calls:
-                print(f"  [{i}] {msg_type}: has {len(msg.tool_calls)} tool_calls")
-            else:
-                print(f"  [{i}] {msg_type}")
+        # State never holds a SystemMessage; the system prompt is only added here
+        return [system_message, *state["messages"]]
+    
+    async def _ainvoke_llm(self, messages_for_llm: List[BaseMessage], config: RunnableConfig,
+                           rate_limited: bool = True) -> AIMessage:
+        """Invoke the tool-bound LLM, respecting the per-batch rate limit if one was configured
         
-        # Invoke the LLM
+        Pass ``rate_limited=False`` when the caller has already taken a token.
+        """
+        rate_limiter = config.get("configurable", {}).get("rate_limiter")
+        if rate_limited and rate_limiter is not None:
+            await rate_limiter.aacquire()
+        return await self.llm_with_tools.ainvoke(messages_for_llm)
+    
+    async def _acall_agent(self, state: AgentState, config: RunnableConfig) -> Dict:
+        """Call the agent to process the current state"""
+        messages_for_llm = self._build_llm_messages(state)
+        
+        # Debug: Log message types before calling LLM (skipped entirely unless enabled)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calling LLM with %d messages:", len(messages_for_llm))
+            for i, msg in enumerate(messages_for_llm):
+                msg_type = type(msg).__name__
+                if isinstance(msg, ToolMessage):
+                    logger.debug("  [%d] %s: tool_call_id=%s", i, msg_type, msg.tool_call_id)
+                elif isinstance(msg, AIMessage) and msg.tool_calls:
+                    logger.debug("  [%d] %s: has %d tool_calls", i, msg_type, len(msg.tool_calls))
+                else:
+                    logger.debug("  [%d] %s", i, msg_type)
+        
+        # Invoke the LLM, reusing a validated speculative call when one is waiting
         try:
-            response = self.llm_with_tools.invoke(messages_for_llm)
-            print(f"LLM response: {type(response).__name__}, has tool_calls: {hasattr(response, 'tool_calls') and bool(response.tool_calls)}")
+            response = await self._take_speculation(state, config)
+            if response is None:
+                response = await self._ainvoke_llm(messages_for_llm, config)
+            logger.debug("LLM response: %s, has tool_calls: %s",
+                         type(response).__name__, bool(getattr(response, "tool_calls", None)))
         except Exception as e:
-            print(f"Error invoking LLM: {e}")
+            logger.error("Error invoking LLM: %s", e)
             raise
         
         # Return updated state - append the response to messages
         return {"messages": [response]}  # LangGraph will merge this with existing messages
     
-    def _should_continue(self, state: AgentState) -> str:
-        """Determine whether to continue with tool calls or end"""
-        messages = state.get("messages", [])
-        if not messages:
-            return "end"
-            
-        last_message = messages[-1]
+    async def _aexecute_tools(self, state: AgentState, config: RunnableConfig) -> Dict:
+        """Execute every tool call from the last AI message concurrently"""
+        tool_calls = state["messages"][-1].tool_calls
         
-        # If the last message has tool calls, continue to tools
-        if isinstance(last_message, AIMessage) and hasattr(last_message, 'tool_calls') and last_message.tool_calls:
-            print(f"Continuing to tools - last message has {len(last_message.tool_calls)} tool calls")
-            return "continue"
+        # Start the next LLM turn on predicted tool results while the real tools run
+        speculation = self._start_speculation(state, tool_calls, config) if self.speculative else None
         
-        # Otherwise, end the conversation
-        print("Ending conversation - no tool calls in last message")
-        return "end"
+        # Tool calls emitted in the same turn are independent, so run them together
+        tool_messages = await asyncio.gather(
+            *(self._ainvoke_tool(tool_call, config) for tool_call in tool_calls)
+        )
+        
+        if self.speculative:
+            self._settle_speculation(speculation, tool_calls, tool_messages, config)
+        
+        return {"messages": list(tool_messages)}
     
-    @traceable(name="video_editing_request")
-    def process_request(self, user_input: str, video_uri: str = None, thread_id: str = "default") -> Dict:
-        """Process a video editing request from the user"""
-        config = {"configurable": {"thread_id": thread_id}}
+    def _start_speculation(self, state: AgentState, tool_calls: List[Dict],
+                           config: RunnableConfig) -> Optional[tuple]:
+        """Launch the next LLM call assuming every tool repeats its last result"""
+        predicted = [self._predicted_tool_results.get(_tool_call_key(tc)) for tc in tool_calls]
+        if any(content is None for content in predicted):
+            return None
+        
+        placeholder_results = [
+            ToolMessage(content=content, name=tc["name"], tool_call_id=tc["id"])
+            for tc, content in zip(tool_calls, predicted)
+        ]
+        messages_for_llm = self._build_llm_messages(state) + placeholder_results
+        
+        # A speculative call spends a rate-limit token even if it is later cancelled, so
+        # it only runs on a token that is free right now and never queues for one. Under
+        # a saturated per-batch limit speculation therefore switches itself off.
+        rate_limiter = config.get("configurable", {}).get("rate_limiter")
+        if rate_limiter is not None and not rate_limiter.acquire(blocking=False):
+            return None
+        task = asyncio.create_task(self._ainvoke_llm(messages_for_llm, config, rate_limited=False))
+        return predicted, task
+    
+    def _settle_speculation(self, speculation: Optional[tuple], tool_calls: List[Dict],
+                            tool_messages: List[ToolMessage], config: RunnableConfig) -> None:
+        """Keep a speculative call whose predictions came true and record the new results"""
+        actual = [msg.content for msg in tool_messages]
+        
+        if speculation is not None:
+            predicted, task = speculation
+            if predicted == actual:
+                thread_id = config.get("configurable", {}).get("thread_id")
+                stale = self._speculations.pop(thread_id, None)
+                if stale is not None:
+                    stale[1].cancel()
+                self._speculations[thread_id] = (tool_messages[-1].tool_call_id, task)
+            else:
+                task.cancel()
+        
+        for tool_call, msg in zip(tool_calls, tool_messages):
+            if msg.status != "error":
+                self._predicted_tool_results[_tool_call_key(tool_call)] = msg.content
+        
+        # Bound the prediction table, evicting the oldest entries first
+        while len(self._predicted_tool_results) > _MAX_PREDICTED_TOOL_RESULTS:
+            del self._predicted_tool_results[next(iter(self._predicted_tool_results))]
+    
+    async def _take_speculation(self, state: AgentState, config: RunnableConfig) -> Optional[AIMessage]:
+        """Return the speculative response for this turn, if one matches the current state"""
+        thread_id = config.get("configurable", {}).get("thread_id")
+        speculation = self._speculations.pop(thread_id, None)
+        if speculation is None:
+            return None
+        
+        after_tool_call_id, task = speculation
+        last_message = state["messages"][-1] if state["messages"] else None
+        if not isinstance(last_message, ToolMessage) or last_message.tool_call_id != after_tool_call_id:
+            task.cancel()
+            return None
+        
+        try:
+            return await task
+        except Exception as e:
+            logger.warning("Speculative LLM call failed, retrying: %s", e)
+            return None
+    
+    async def _ainvoke_tool(self, tool_call: Dict, config: RunnableConfig) -> ToolMessage:
+        """Run a single tool call, reporting failures back to the LLM instead of raising"""
+        selected_tool = self._tool_map.get(tool_call["name"])
+        try:
+            if selected_tool is None:
+                raise ValueError(f"Unknown tool: {tool_call['name']}")
+            async with _tool_semaphore():
+                output = await selected_tool.ainvoke(tool_call["args"], config)
+        except Exception as e:
+            return ToolMessage(
+                content=f"Error: {e!r}\n Please fix your mistakes.",
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"],
+                status="error"
+            )
+        
+        # Tools already return JSON text, see _json_tool
+        return ToolMessage(
+            content=output,
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"]
+        )
+    
+    def _plan_scope(self) -> Any:
+        """Record a request's tool calls into a plan when deferred, else run them as they come"""
+        return planning() if self.deferred else contextlib.nullcontext()
+    
+    def _should_continue(self, state: AgentState) -> str:
+        """Determine whether to continue with tool calls or end"""
+        messages = state.get("messages")
+        tool_calls = getattr(messages[-1], "tool_calls", None) if messages else None
+        return "continue" if tool_calls else "end"
+    
+    async def aprocess_request(self, user_input: str, video_uri: str = None, thread_id: str = "default") -> Dict:
+        """Process a video editing request from the user asynchronously"""
+        config = self._run_config(thread_id)
         
         # Create initial state
         initial_state = {
@@ -237,103 +559,360 @@ Always ask for clarification if the request is ambiguous or missing required par
         
         try:
             # Run the graph
-            print(f"\n=== Processing request: '{user_input[:100]}...' ===")
-            final_state = self.graph.invoke(initial_state, config=config)
-            
-            # Extract final output
-            final_messages = final_state.get("messages", [])
+            logger.debug("Processing request: %.100s", user_input)
+            final_state = {}
+            final_output = None
             
-            # Find the last AI message with content
-            final_output = "No response generated"
-            for msg in reversed(final_messages):
-                if isinstance(msg, AIMessage) and msg.content:
-                    final_output = msg.content
-                    break
-            
-            return {
-                "final_output": final_output,
-                "messages": final_messages,
-                "current_video_uri": final_state.get("current_video_uri"),
-                "success": True
-            }
+            with self._plan_scope():
+                # Track the latest agent reply as it is produced instead of re-scanning
+                # the whole history afterwards
+                async for mode, chunk in self.graph.astream(initial_state, config=config,
+                                                            stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        final_state = chunk
+                    elif chunk.get("agent"):
+                        content = chunk["agent"]["messages"][-1].content
+                        if content:
+                            final_output = content
+                
+                result = self._build_result(final_state, final_output)
+                if self.deferred:
+                    result["outputs"] = await aflush_plan()
+            return result
         except Exception as e:
-            print(f"Error processing request: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "final_output": f"Error processing request: {str(e)}",
-                "messages": [],
-                "current_video_uri": video_uri,
-                "success": False
-            }
+            return self._build_error_result(e, video_uri)
     
-    def get_conversation_history(self, thread_id: str = "default") -> List[Dict]:
-        """Get conversation history for a thread"""
+    async def astream_request(self, user_input: str, video_uri: str = None,
+                              thread_id: str = "default") -> AsyncIterator[Dict]:
+        """Process a video editing request, yielding progress events as they happen
+        
+        Yields ``{"type": "llm_token", "data": str}`` for each piece of the agent's reply,
+        ``{"type": "tool_start", "name": str, "data": dict}`` and
+        ``{"type": "tool_end", "name": str, "data": str}`` (the result as JSON) around
+        each tool call, and
+        finally ``{"type": "final", "data": dict}`` carrying the same result dict that
+        ``aprocess_request`` returns.
+        """
+        config = self._run_config(thread_id)
+        
+        # Create initial state
+        initial_state = {
+            "messages": [HumanMessage(content=user_input)],
+            "current_video_uri": video_uri
+        }
+        
+        final_state = {}
+        final_output = None
+        streamed_turn = False
+        try:
+            logger.debug("Streaming request: %.100s", user_input)
+            with self._plan_scope():
+                async for event in self.graph.astream_events(initial_state, config=config, version="v2"):
+                    kind = event["event"]
+                    node = event.get("metadata", {}).get("langgraph_node")
+                    
+                    # Only stream tokens produced by the agent node, never from a speculative call
+                    if kind == "on_chat_model_stream" and node == "agent":
+                        token = event["data"]["chunk"].content
+                        if token:
+                            streamed_turn = True
+                            yield {"type": "llm_token", "data": token}
+                    elif kind == "on_chain_start" and event["name"] == "agent":
+                        streamed_turn = False
+                    elif kind == "on_chain_end" and event["name"] == "agent":
+                        content = event["data"]["output"]["messages"][-1].content
+                        if content:
+                            final_output = content
+                            # A reused speculative response arrives whole rather than token by token
+                            if not streamed_turn:
+                                yield {"type": "llm_token", "data": content}
+                    elif kind == "on_tool_start":
+                        yield {"type": "tool_start", "name": event["name"], "data": event["data"].get("input")}
+                    elif kind == "on_tool_end":
+                        yield {"type": "tool_end", "name": event["name"], "data": event["data"].get("output")}
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        final_state = event["data"]["output"]
+                
+                result = self._build_result(final_state, final_output)
+                if self.deferred:
+                    result["outputs"] = await aflush_plan()
+        except Exception as e:
+            yield {"type": "final", "data": self._build_error_result(e, video_uri)}
+            return
+        
+        yield {"type": "final", "data": result}
+    
+    def process_request(self, user_input: str, video_uri: str = None, thread_id: str = "default") -> Dict:
+        """Process a video editing request from the user (blocking wrapper around aprocess_request)"""
+        return _run_sync(self.aprocess_request(user_input, video_uri=video_uri, thread_id=thread_id))
+    
+    async def aprocess_batch(self, requests: List[Dict], max_concurrency: int = 8,
+                             rate_limit_per_min: Optional[int] = None) -> List[Dict]:
+        """Process several video editing requests concurrently
+        
+        Each request is a dict with a ``user_input`` key and optional ``video_uri`` and
+        ``thread_id`` keys. Requests without a thread_id get a unique one. At most
+        ``max_concurrency`` requests run at once and, if ``rate_limit_per_min`` is set,
+        LLM calls across the whole batch are throttled to that rate. Results are returned
+        in input order with the same shape as ``aprocess_request``.
+        """
+        if not requests:
+            return []
+        
+        rate_limiter = None
+        if rate_limit_per_min:
+            rate_limiter = InMemoryRateLimiter(
+                requests_per_second=rate_limit_per_min / 60,
+                check_every_n_seconds=0.1,
+                max_bucket_size=1
+            )
+        
+        initial_states = []
+        configs = []
+        for request in requests:
+            thread_id = request.get("thread_id") or f"batch_{uuid.uuid4().hex}"
+            initial_states.append({
+                "messages": [HumanMessage(content=request["user_input"])],
+                "current_video_uri": request.get("video_uri")
+            })
+            configs.append({
+                **self._run_config(thread_id, rate_limiter=rate_limiter),
+                "max_concurrency": max_concurrency
+            })
+        
+        # abatch bounds in-flight runs with a semaphore sized from max_concurrency
+        logger.debug("Processing batch of %d requests", len(requests))
+        final_states = await self.graph.abatch(initial_states, config=configs, return_exceptions=True)
+        
+        results = []
+        for request, final_state in zip(requests, final_states):
+            if isinstance(final_state, Exception):
+                results.append(self._build_error_result(final_state, request.get("video_uri")))
+            else:
+                results.append(self._build_result(final_state))
+        return results
+    
+    def process_batch(self, requests: List[Dict], max_concurrency: int = 8,
+                      rate_limit_per_min: Optional[int] = None) -> List[Dict]:
+        """Process several video editing requests (blocking wrapper around aprocess_batch)"""
+        return _run_sync(self.aprocess_batch(
+            requests,
+            max_concurrency=max_concurrency,
+            rate_limit_per_min=rate_limit_per_min
+        ))
+    
+    def _run_config(self, thread_id: str, **configurable: Any) -> Dict:
+        """Build the config for one graph run, attaching this agent's tracer if any"""
+        config = {
+            "configurable": {"thread_id": thread_id, **configurable},
+            "run_name": "video_editing_request"
+        }
+        if self._tracer is not None:
+            config["callbacks"] = [self._tracer]
+        return config
+    
+    def _build_result(self, final_state: Dict, final_output: Optional[str] = None) -> Dict:
+        """Build the response dict from a finished graph state
+        
+        ``final_output`` is the last agent reply if the caller tracked it while the graph
+        ran; otherwise the last AI message with content is looked up in the state.
+        """
+        final_messages = final_state.get("messages", [])
+        
+        if final_output is None:
+            final_output = next(
+                (msg.content for msg in reversed(final_messages) if isinstance(msg, AIMessage) and msg.content),
+                "No response generated"
+            )
+        
+        return {
+            "final_output": final_output,
+            "messages": final_messages,
+            "current_video_uri": final_state.get("current_video_uri"),
+            "success": True
+        }
+    
+    def _build_error_result(self, error: BaseException, video_uri: Optional[str]) -> Dict:
+        """Build the response dict for a request that failed"""
+        logger.error("Error processing request: %s", error, exc_info=error)
+        return {
+            "final_output": f"Error processing request: {str(error)}",
+            "messages": [],
+            "current_video_uri": video_uri,
+            "success": False
+        }
+    
+    async def aget_conversation_history(self, thread_id: str = "default") -> List[Dict]:
+        """Get conversation history for a thread asynchronously
+        
+        Results are cached per checkpoint, so repeated calls between requests are
+        cheap. The returned list is shared with the cache and must not be mutated.
+        """
         config = {"configurable": {"thread_id": thread_id}}
         
         try:
             # Get the current state from memory
-            current_state = self.graph.get_state(config)
+            current_state = await self.graph.aget_state(config)
             
             if current_state and current_state.values:
+                cache_key = (thread_id, current_state.config["configurable"].get("checkpoint_id"))
+                history = self._history_cache.get(cache_key)
+                if history is not None:
+                    self._history_cache.move_to_end(cache_key)
+                    return history
+                
                 messages = current_state.values.get("messages", [])
                 history = []
                 
                 for msg in messages:
-                    if isinstance(msg, HumanMessage):
-                        history.append({
-                            "type": "human",
-                            "content": msg.content,
-                            "timestamp": getattr(msg, "timestamp", None)
-                        })
-                    elif isinstance(msg, AIMessage):
-                        # Include both content and tool calls if present
-                        content = msg.content
-                        if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                            tool_info = f" [Called tools: {', '.join(tc['name'] for tc in msg.tool_calls)}]"
-                            content = (content or "") + tool_info
-                        if content:
-                            history.append({
-                                "type": "ai",
-                                "content": content,
-                                "timestamp": getattr(msg, "timestamp", None)
-                            })
-                    elif isinstance(msg, ToolMessage):
-                        history.append({
-                            "type": "tool",
-                            "content": msg.content,
-                            "tool_call_id": getattr(msg, "tool_call_id", None),
-                            "timestamp": getattr(msg, "timestamp", None)
-                        })
+                    formatter = _HISTORY_FORMATTERS.get(type(msg))
+                    if formatter is not None:
+                        entry = formatter(msg)
+                        if entry is not None:
+                            history.append(entry)
                 
+                self._history_cache[cache_key] = history
+                if len(self._history_cache) > _HISTORY_CACHE_SIZE:
+                    self._history_cache.popitem(last=False)
                 return history
         except Exception as e:
-            print(f"Error getting conversation history: {e}")
+            logger.error("Error getting conversation history: %s", e)
             return []
         
         return []
     
-    def clear_history(self, thread_id: str = "default") -> bool:
-        """Clear conversation history for a thread"""
+    def get_conversation_history(self, thread_id: str = "default") -> List[Dict]:
+        """Get conversation history for a thread (blocking wrapper around aget_conversation_history)"""
+        return _run_sync(self.aget_conversation_history(thread_id))
+    
+    async def aclear_history(self, thread_id: str = "default") -> bool:
+        """Clear conversation history for a thread asynchronously"""
+        for cache_key in [key for key in self._history_cache if key[0] == thread_id]:
+            del self._history_cache[cache_key]
+        
         try:
             config = {"configurable": {"thread_id": thread_id}}
             # Reset state to empty
-            self.graph.update_state(
+            await self.graph.aupdate_state(
                 config,
                 {"messages": []},
                 as_node="__start__"
             )
             return True
         except Exception as e:
-            print(f"Error clearing history: {e}")
+            logger.error("Error clearing history: %s", e)
             return False
+    
+    def clear_history(self, thread_id: str = "default") -> bool:
+        """Clear conversation history for a thread (blocking wrapper around aclear_history)"""
+        return _run_sync(self.aclear_history(thread_id))
+    
+    def bind_video(self, video_uri: str) -> "BoundVideoAgent":
+        """Return a view of this agent that works on a single video URI"""
+        return BoundVideoAgent(self, video_uri)
+    
+    async def aclose(self) -> None:
+        """Release what the agent holds on the running event loop
+        
+        Closes the loop's pooled HTTP client, which otherwise keeps the loop and its
+        sockets alive, and any connections the agent opened itself, such as a SQLite
+        checkpointer. Await it on every loop of your own the agent was used from before
+        that loop ends, e.g. at the end of each asyncio.run(); the blocking wrappers'
+        background loop is cleaned up at exit. Other agents on the same loop open a new
+        client on their next call.
+        """
+        self._llms.pop(asyncio.get_running_loop(), None)
+        await _aclose_http_client()
+        while self._owned_connections:
+            await self._owned_connections.pop().close()
+
+
+class BoundVideoAgent:
+    """A VideoEditingAgent specialized to one video URI
+    
+    Saves passing the same URI to every request in a session. The system message for
+    the URI is still looked up each turn, which is a hit in the agent's prompt cache.
+    """
+    
+    def __init__(self, agent: VideoEditingAgent, video_uri: str):
+        self.agent = agent
+        self.video_uri = video_uri
+    
+    async def aprocess_request(self, user_input: str, thread_id: str = "default") -> Dict:
+        """Process a request against the bound video asynchronously"""
+        return await self.agent.aprocess_request(user_input, video_uri=self.video_uri, thread_id=thread_id)
+    
+    def process_request(self, user_input: str, thread_id: str = "default") -> Dict:
+        """Process a request against the bound video (blocking wrapper around aprocess_request)"""
+        return _run_sync(self.aprocess_request(user_input, thread_id=thread_id))
+    
+    def astream_request(self, user_input: str, thread_id: str = "default") -> AsyncIterator[Dict]:
+        """Stream a request against the bound video, see VideoEditingAgent.astream_request"""
+        return self.agent.astream_request(user_input, video_uri=self.video_uri, thread_id=thread_id)
 
 
 def create_video_editing_agent(openai_api_key: str = None, langsmith_api_key: str = None, 
-                              langsmith_project: str = "video-editing-agent") -> VideoEditingAgent:
+                              langsmith_project: str = "video-editing-agent",
+                              speculative: bool = False,
+                              checkpointer: Optional[BaseCheckpointSaver] = None,
+                              deferred: bool = False) -> VideoEditingAgent:
     """Factory function to create a video editing agent with optional LangSmith tracing"""
     return VideoEditingAgent(
         openai_api_key=openai_api_key,
         langsmith_api_key=langsmith_api_key,
-        langsmith_project=langsmith_project
-    )
\ No newline at end of file
+        langsmith_project=langsmith_project,
+        speculative=speculative,
+        checkpointer=checkpointer,
+        deferred=deferred
+    )
+
+
+async def acreate_video_editing_agent(openai_api_key: str = None, langsmith_api_key: str = None,
+                                      langsmith_project: str = "video-editing-agent",
+                                      speculative: bool = False,
+                                      checkpointer_uri: Optional[str] = None,
+                                      deferred: bool = False) -> VideoEditingAgent:
+    """Async factory that can back the agent with a durable SQLite checkpointer
+    
+    ``checkpointer_uri`` accepts ``sqlite+aiosqlite:///state.db``, ``sqlite:///state.db``
+    or a plain file path, and requires the optional ``langgraph-checkpoint-sqlite``
+    dependency. Call ``await agent.aclose()`` when done to close the connection.
+    """
+    if not checkpointer_uri:
+        return create_video_editing_agent(
+            openai_api_key=openai_api_key,
+            langsmith_api_key=langsmith_api_key,
+            langsmith_project=langsmith_project,
+            speculative=speculative,
+            deferred=deferred
+        )
+    
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    
+    conn = await aiosqlite.connect(_sqlite_path(checkpointer_uri))
+    try:
+        checkpointer = AsyncSqliteSaver(conn)
+        await checkpointer.setup()
+        agent = create_video_editing_agent(
+            openai_api_key=openai_api_key,
+            langsmith_api_key=langsmith_api_key,
+            langsmith_project=langsmith_project,
+            speculative=speculative,
+            checkpointer=checkpointer,
+            deferred=deferred
+        )
+    except BaseException:
+        await conn.close()
+        raise
+    
+    agent._owned_connections.append(conn)
+    return agent
+
+
+def _sqlite_path(checkpointer_uri: str) -> str:
+    """Extract the database path from a SQLite URI"""
+    for scheme in ("sqlite+aiosqlite:///", "sqlite:///"):
+        if checkpointer_uri.startswith(scheme):
+            return checkpointer_uri[len(scheme):]
+    return checkpointer_uri
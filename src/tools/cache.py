@@ -0,0 +1,130 @@
+"""
+Content-addressed S3 cache for derived media
+
+A tool's output is fully determined by its name, its arguments and the content of
+its S3 inputs, so ``@s3_cached`` hashes those into a deterministic key under the
+cache bucket. If an object already exists there, the tool returns it without
+running; otherwise ``flush_plan()`` uploads the output there once it is written.
+Caching is off unless ``VIDEO_CACHE_BUCKET`` is set, and needs the ``s3`` extra
+(boto3) when it is on.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from src.tools import s3
+
+
+# Bucket derived artifacts are cached in; caching is disabled when unset
+CACHE_BUCKET = os.getenv("VIDEO_CACHE_BUCKET")
+
+# Names of the tools decorated with @s3_cached, whose outputs are written back
+CACHED_TOOLS: Set[str] = set()
+
+
+# Source objects can be overwritten, so their ETags are only reused for a few seconds:
+# long enough to absorb repeated calls within one turn
+_SOURCE_ETAG_TTL = 5.0
+_MAX_SOURCE_ETAGS = 1024
+
+# Source ETags by URI, with the monotonic time each stops being trusted
+_source_etags: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_source_etags_lock = threading.Lock()
+
+
+class _NotFound(Exception):
+    """Raised for missing objects, so lru_cache only remembers hits"""
+
+
+def _head(uri: str) -> str:
+    """HEAD an S3 object and return its ETag"""
+    client = s3.client()
+    bucket, key = s3.split_uri(uri)
+    try:
+        return client.head_object(Bucket=bucket, Key=key)["ETag"]
+    except client.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            raise _NotFound(uri) from None
+        raise
+
+
+def _source_etag(uri: str) -> str:
+    """Return a source object's ETag, reusing a recent HEAD for the same URI"""
+    now = time.monotonic()
+    with _source_etags_lock:
+        cached = _source_etags.get(uri)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+    etag = _head(uri)
+    with _source_etags_lock:
+        _source_etags[uri] = (now + _SOURCE_ETAG_TTL, etag)
+        _source_etags.move_to_end(uri)
+        while len(_source_etags) > _MAX_SOURCE_ETAGS:
+            _source_etags.popitem(last=False)
+    return etag
+
+
+@functools.lru_cache(maxsize=1024)
+def _artifact_etag(uri: str) -> str:
+    """HEAD a cached artifact
+
+    Artifact keys are content-addressed, so an artifact that exists never changes and
+    hits can be remembered for good. Misses raise and are not remembered, so an
+    artifact written later is still found.
+    """
+    return _head(uri)
+
+
+def cache_uri(op_name: str, arguments: Dict[str, object]) -> Optional[str]:
+    """Return the cache location for a tool call, or None if it can't be cached
+
+    Calls are only cacheable when every ``*_s3_uri`` argument is an existing S3 object,
+    since their ETags stand in for the input content.
+    """
+    etags = []
+    for name, value in sorted(arguments.items()):
+        if name.endswith("_s3_uri"):
+            if not s3.is_s3_uri(value):
+                return None
+            try:
+                etags.append(_source_etag(value))
+            except _NotFound:
+                return None
+
+    payload = op_name + json.dumps(arguments, sort_keys=True, default=str) + "".join(etags)
+    key = hashlib.blake2b(payload.encode(), digest_size=32).hexdigest()
+    return f"{s3.S3_SCHEME}{CACHE_BUCKET}/{op_name}/{key[:2]}/{key}"
+
+
+def s3_cached(func: Callable) -> Callable:
+    """Return a previously computed artifact for identical tool calls instead of running"""
+    CACHED_TOOLS.add(func.__name__)
+    if not CACHE_BUCKET:
+        return func
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        uri = cache_uri(func.__name__, bound.arguments)
+        if uri is not None:
+            try:
+                _artifact_etag(uri)
+            except _NotFound:
+                pass
+            else:
+                return MappingProxyType({"message": f"{func.__name__} result cached", "media": uri})
+        return func(*args, **kwargs)
+
+    return wrapper
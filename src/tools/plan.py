@@ -0,0 +1,633 @@
+"""
+Deferred execution of video editing tools
+
+Inside a ``planning()`` block, calls to the tools in ``tools.py`` are recorded as
+operations instead of running, and each returns a symbolic ``pending://`` handle in
+place of its output URI. Handles can be passed to later tool calls, so an agent can
+describe a whole editing chain before anything is decoded.
+
+``flush_plan()`` compiles the recorded operations into FFmpeg jobs and runs them:
+
+- consecutive single-input filter operations (trim -> resize -> color_correct ...)
+  are fused into one filter chain, so the source is decoded and encoded once;
+- fused chains that read the same source are emitted as one FFmpeg invocation with
+  several outputs, splitting the decoded stream between them;
+- jobs that don't depend on each other run in parallel, each FFmpeg process capped
+  at a few threads.
+
+This module is the only place that shells out to FFmpeg. Media bytes never pass
+through Python: S3 sources are staged by the boto3 transfer manager and everything
+after that is read and written by FFmpeg itself, so there is no Python-side file I/O
+path to tune. Likewise crop, scale and overlay run as FFmpeg filters, which reuse
+their own frame pools, rather than as per-frame loops over Python buffers.
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import hashlib
+import inspect
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from src.tools import cache, s3
+
+
+PENDING_SCHEME = "pending://"
+
+# Operations recorded by the innermost planning() block, or None outside of one
+_tool_plan: contextvars.ContextVar[Optional[List["Op"]]] = contextvars.ContextVar("tool_plan", default=None)
+_op_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Op:
+    """A recorded tool call"""
+    kind: str
+    args: Tuple[Tuple[str, Any], ...]
+    outputs: Tuple[str, ...]
+
+    @property
+    def arguments(self) -> Dict[str, Any]:
+        """The call's arguments by name"""
+        return dict(self.args)
+
+    @property
+    def dependencies(self) -> Tuple[str, ...]:
+        """Pending handles this operation reads"""
+        return tuple(value for _, value in self.args if is_pending(value))
+
+
+@dataclass(frozen=True)
+class Job:
+    """One FFmpeg invocation compiled from a plan
+
+    ``inputs`` are the URIs, paths or pending handles the job reads, ``outputs`` the
+    handles it writes. ``build`` turns local paths for both into FFmpeg arguments.
+    ``uploads`` pairs output handles with the S3 URIs they are delivered to.
+    """
+    ops: Tuple[Op, ...]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    output_extensions: Tuple[str, ...]
+    build: Callable[[Mapping[str, str], Sequence[str]], List[str]]
+    uploads: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def dependencies(self) -> Tuple[str, ...]:
+        """Pending handles this job needs another job to produce first"""
+        return tuple(ref for ref in self.inputs if is_pending(ref))
+
+
+def is_pending(value: Any) -> bool:
+    """Whether a value is a handle to the output of a planned operation"""
+    return isinstance(value, str) and value.startswith(PENDING_SCHEME)
+
+
+@contextlib.contextmanager
+def planning() -> Iterator[List[Op]]:
+    """Record tool calls made inside the block instead of executing them"""
+    token = _tool_plan.set([])
+    try:
+        yield _tool_plan.get()
+    finally:
+        _tool_plan.reset(token)
+
+
+def deferred(func: Optional[Callable] = None, *, outputs: int = 1) -> Callable:
+    """Make a tool record itself into the active plan instead of running
+
+    ``outputs`` is the number of media files the tool produces; tools with more than
+    one (``@deferred(outputs=2)``) return a tuple of handles.
+    """
+    if func is None:
+        return functools.partial(deferred, outputs=outputs)
+
+    signature = inspect.signature(func)
+    output_count = outputs
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        plan = _tool_plan.get()
+        if plan is None:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        op_id = next(_op_ids)
+        if output_count == 1:
+            outputs = (f"{PENDING_SCHEME}op_{op_id}",)
+        else:
+            outputs = tuple(f"{PENDING_SCHEME}op_{op_id}/{i}" for i in range(1, output_count + 1))
+        plan.append(Op(kind=func.__name__, args=tuple(bound.arguments.items()), outputs=outputs))
+
+        return MappingProxyType({
+            "message": f"{func.__name__} planned",
+            "media": outputs[0] if output_count == 1 else outputs
+        })
+
+    return wrapper
+
+
+# FFmpeg threads per job. Several narrow FFmpeg processes keep more cores busy than
+# one wide one, so jobs run cpu_count // FFMPEG_THREADS at a time.
+FFMPEG_THREADS = 4
+
+
+def default_workers() -> int:
+    """Number of FFmpeg jobs to run at once on this machine"""
+    return max(1, (os.cpu_count() or 1) // FFMPEG_THREADS)
+
+
+class _ReadySet:
+    """Kahn's algorithm over a compiled plan: hands out jobs whose inputs all exist"""
+
+    def __init__(self, jobs: Sequence[Job]):
+        producer = {handle: job for job in jobs for handle in job.outputs}
+        self._waiting = {id(job): 0 for job in jobs}
+        self._dependents: Dict[int, List[Job]] = {id(job): [] for job in jobs}
+        for job in jobs:
+            for handle in set(job.dependencies):
+                if handle in producer:
+                    self._waiting[id(job)] += 1
+                    self._dependents[id(producer[handle])].append(job)
+        self._ready = [job for job in jobs if not self._waiting[id(job)]]
+        self.remaining = len(jobs)
+
+    def take(self) -> List[Job]:
+        """Return every job that became ready since the last call"""
+        ready, self._ready = self._ready, []
+        return ready
+
+    def done(self, job: Job) -> None:
+        """Mark a job finished, releasing the jobs that were waiting on it"""
+        self.remaining -= 1
+        for dependent in self._dependents[id(job)]:
+            self._waiting[id(dependent)] -= 1
+            if not self._waiting[id(dependent)]:
+                self._ready.append(dependent)
+
+
+def _take_plan() -> List[Job]:
+    """Compile and empty the active plan"""
+    plan = _tool_plan.get()
+    if plan is None:
+        raise RuntimeError("flush_plan() called outside of a planning() block")
+    jobs = compile_plan(plan)
+    plan.clear()
+    return jobs
+
+
+def _stage_inputs(jobs: Sequence[Job], stage_dir: str,
+                  download: Callable[[str, str], None]) -> Dict[str, str]:
+    """Download every S3 object the plan reads once, returning its local path by URI
+
+    FFmpeg reading s3:// sources directly issues a ranged request per seek, which is
+    far slower than fetching the whole object up front, and lets every job touching
+    the same source fetch it again.
+    """
+    staged = {}
+    for uri in sorted({ref for job in jobs for ref in job.inputs if s3.is_s3_uri(ref)}):
+        name = hashlib.sha256(uri.encode()).hexdigest()[:16] + os.path.splitext(uri)[1]
+        staged[uri] = os.path.join(stage_dir, name)
+        download(uri, staged[uri])
+    return staged
+
+
+def _output_paths(job: Job, workdir: str) -> List[str]:
+    """Local paths a job writes its outputs to"""
+    return [
+        os.path.join(workdir, f"{handle[len(PENDING_SCHEME):].replace('/', '_')}.{ext}")
+        for handle, ext in zip(job.outputs, job.output_extensions)
+    ]
+
+
+def _cache_uploads(job: Job) -> List[Tuple[str, str]]:
+    """Cache keys for the job's outputs that come from cacheable operations
+
+    Only operations whose inputs are all S3 objects have a key, so outputs derived
+    from other outputs of the same plan are not cached.
+    """
+    if not cache.CACHE_BUCKET:
+        return []
+    uploads = []
+    for op in job.ops:
+        if op.kind in cache.CACHED_TOOLS and op.outputs[0] in job.outputs:
+            uri = cache.cache_uri(op.kind, op.arguments)
+            if uri is not None:
+                uploads.append((op.outputs[0], uri))
+    return uploads
+
+
+def _run_job(job: Job, input_paths: Mapping[str, str], output_paths: List[str],
+             runner: Callable[[List[str]], None], upload: Callable[[str, str], None]) -> None:
+    """Run one job with its threads capped per output, then upload outputs bound for S3
+
+    Besides explicit destinations such as export_video's, outputs of cacheable tools
+    are written back to their artifact cache key so the next identical call is a hit.
+    """
+    argv = job.build(input_paths, output_paths)
+    for output_path in output_paths:
+        i = argv.index(output_path)
+        argv[i:i] = ["-threads", str(FFMPEG_THREADS)]
+    runner(argv)
+
+    local = dict(zip(job.outputs, output_paths))
+    for handle, uri in (*job.uploads, *_cache_uploads(job)):
+        upload(local[handle], uri)
+
+
+class _PlanExecution:
+    """State shared by flush_plan() and aflush_plan() while a plan runs
+
+    Owns the compiled jobs, the worker pool and the staging directory. The two entry
+    points differ only in how they wait for the futures ``submit_ready`` returns.
+    """
+
+    def __init__(self, workdir: Optional[str], runner: Optional[Callable[[List[str]], None]],
+                 max_workers: Optional[int], download: Optional[Callable[[str, str], None]],
+                 upload: Optional[Callable[[str, str], None]]):
+        self.jobs = _take_plan()
+        self.ready = _ReadySet(self.jobs)
+        self.workdir = workdir or tempfile.mkdtemp(prefix="video-plan-")
+        self.runner = runner or run_ffmpeg
+        self.download = download or s3.download
+        self.upload = upload or s3.upload
+        self.stage_dir = tempfile.mkdtemp(prefix="video-stage-")
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers or default_workers())
+        self.paths: Dict[str, str] = {}
+        self.running: Dict[concurrent.futures.Future, Tuple[Job, List[str]]] = {}
+
+    def stage(self) -> concurrent.futures.Future:
+        """Start downloading the plan's S3 inputs; pass the result to ``staged``"""
+        return self.pool.submit(_stage_inputs, self.jobs, self.stage_dir, self.download)
+
+    def staged(self, paths: Dict[str, str]) -> None:
+        """Record where the S3 inputs were downloaded to"""
+        self.paths.update(paths)
+
+    def submit_ready(self) -> List[concurrent.futures.Future]:
+        """Start every job whose inputs exist and return the futures of all running jobs"""
+        for job in self.ready.take():
+            input_paths = {ref: self.paths.get(ref, ref) for ref in job.inputs}
+            output_paths = _output_paths(job, self.workdir)
+            future = self.pool.submit(_run_job, job, input_paths, output_paths, self.runner, self.upload)
+            self.running[future] = (job, output_paths)
+
+        if not self.running:
+            raise RuntimeError(f"Cannot schedule plan: {self.ready.remaining} jobs wait on outputs never produced")
+        return list(self.running)
+
+    def collect(self) -> None:
+        """Record the outputs of finished jobs, raising the first job failure"""
+        for future in [f for f in self.running if f.done()]:
+            job, output_paths = self.running.pop(future)
+            future.result()
+            self.paths.update(zip(job.outputs, output_paths))
+            self.ready.done(job)
+
+    def close(self, wait: bool) -> None:
+        """Stop the pool and delete the staged inputs"""
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+        shutil.rmtree(self.stage_dir, ignore_errors=True)
+
+    def outputs(self) -> Dict[str, str]:
+        """Local output path by pending handle"""
+        return {handle: path for handle, path in self.paths.items() if is_pending(handle)}
+
+
+def flush_plan(workdir: Optional[str] = None,
+               runner: Optional[Callable[[List[str]], None]] = None,
+               max_workers: Optional[int] = None,
+               download: Optional[Callable[[str, str], None]] = None,
+               upload: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """Compile and run the active plan, returning the local path of every output written
+
+    Handles of operations fused into the middle of a chain are never materialized and
+    have no entry; only the handle at the end of each chain does. Jobs run as soon as
+    the jobs producing their inputs have finished, up to ``max_workers``
+    (``default_workers()``) at a time. Outputs are written under ``workdir`` (a new
+    temporary directory by default). ``runner`` receives each FFmpeg argument list and
+    defaults to running ffmpeg. The plan is emptied afterwards.
+
+    S3 inputs are downloaded once per plan with ``download`` (``s3.download`` by
+    default) and the local copies deleted when the plan finishes. Outputs with an S3
+    destination, such as export_video's, are delivered with ``upload`` (``s3.upload``),
+    as are outputs of cacheable tools to their artifact cache key.
+    """
+    execution = _PlanExecution(workdir, runner, max_workers, download, upload)
+    try:
+        execution.staged(execution.stage().result())
+        while execution.ready.remaining:
+            concurrent.futures.wait(execution.submit_ready(), return_when=concurrent.futures.FIRST_COMPLETED)
+            execution.collect()
+    finally:
+        execution.close(wait=True)
+    return execution.outputs()
+
+
+async def aflush_plan(workdir: Optional[str] = None,
+                      runner: Optional[Callable[[List[str]], None]] = None,
+                      max_workers: Optional[int] = None,
+                      download: Optional[Callable[[str, str], None]] = None,
+                      upload: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """Async version of flush_plan() that waits on the FFmpeg jobs without blocking the loop"""
+    execution = _PlanExecution(workdir, runner, max_workers, download, upload)
+    try:
+        execution.staged(await asyncio.wrap_future(execution.stage()))
+        waiters: Dict[concurrent.futures.Future, asyncio.Future] = {}
+        while execution.ready.remaining:
+            for future in execution.submit_ready():
+                if future not in waiters:
+                    waiters[future] = asyncio.wrap_future(future)
+            await asyncio.wait(waiters.values(), return_when=asyncio.FIRST_COMPLETED)
+            execution.collect()
+            waiters = {f: w for f, w in waiters.items() if f in execution.running}
+    finally:
+        # Don't block the loop on jobs still running after a failure or cancellation
+        execution.close(wait=False)
+    return execution.outputs()
+
+
+def run_ffmpeg(argv: List[str]) -> None:
+    """Run FFmpeg with the given arguments, raising CalledProcessError on failure"""
+    subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *argv],
+                   check=True, capture_output=True)
+
+
+def probe_duration(path: str) -> float:
+    """Return a media file's duration in seconds"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        check=True, capture_output=True, text=True
+    )
+    return float(result.stdout.strip())
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+def _quote(value: Any) -> str:
+    """Quote a value for use inside an FFmpeg filter graph"""
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "'\\''").replace(":", "\\:") + "'"
+
+
+def _num(value: float) -> str:
+    """Format a number compactly for FFmpeg"""
+    return f"{value:g}"
+
+
+# Single-input video filters that can be fused into one chain, keyed by tool name.
+# Each returns the filter for the operation and the extra inputs (e.g. a subtitle
+# file) the filter reads.
+_CHAIN_FILTERS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, Tuple[str, ...]]]] = {
+    "crop_frame": lambda a: (f"crop={a['width']}:{a['height']}:{a['x']}:{a['y']}", ()),
+    "resize_video": lambda a: (f"scale={a['target_width']}:{a['target_height']}", ()),
+    "change_resolution": lambda a: (f"scale={a['width']}:{a['height']}", ()),
+    "adjust_frame_rate": lambda a: (f"fps={a['target_fps']}", ()),
+    # The tools take brightness as a factor around 1.0, FFmpeg's eq as an offset around 0
+    "color_correct": lambda a: (
+        f"eq=brightness={_num(a['brightness'] - 1.0)}:contrast={_num(a['contrast'])}"
+        f":saturation={_num(a['saturation'])}",
+        ()
+    ),
+    "add_subtitles": lambda a: (f"subtitles={{{a['subtitles_s3_uri']}}}", (a["subtitles_s3_uri"],)),
+    "add_captions": lambda a: (
+        f"drawtext=text={_quote(a['text'])}:x={a['x']}:y={a['y']}"
+        f":enable='between(t,{_num(a['start_time'])},{_num(a['end_time'])})'",
+        ()
+    ),
+}
+
+
+@dataclass
+class _Chain:
+    """Fusable operations applied in sequence to one source"""
+    source: str
+    seek: Optional[Tuple[float, float]] = None
+    ops: Tuple[Op, ...] = ()
+
+    @property
+    def output(self) -> str:
+        return self.ops[-1].outputs[0]
+
+    @property
+    def resources(self) -> Tuple[str, ...]:
+        """Inputs the chain's filters read besides the source, e.g. subtitle files"""
+        return tuple(
+            ref for op in self.ops if op.kind in _CHAIN_FILTERS
+            for ref in _CHAIN_FILTERS[op.kind](op.arguments)[1]
+        )
+
+
+def compile_plan(ops: Sequence[Op]) -> List[Job]:
+    """Compile recorded operations into FFmpeg jobs, in an order that respects dependencies"""
+    consumers: Dict[str, int] = {}
+    for op in ops:
+        for handle in op.dependencies:
+            consumers[handle] = consumers.get(handle, 0) + 1
+
+    chain_by_output: Dict[str, _Chain] = {}
+    items: List[Any] = []  # Job or _Chain, in plan order
+
+    for op in ops:
+        args = op.arguments
+        source = args.get("video_s3_uri")
+
+        if op.kind == "trim_video":
+            # Trims become input seeking, so they can only start a chain
+            chain = _Chain(source=source, seek=(args["start_time"], args["end_time"]), ops=(op,))
+        elif op.kind in _CHAIN_FILTERS:
+            chain = chain_by_output.pop(source, None)
+            if chain is not None and consumers.get(source) == 1:
+                # Only consumer of the previous chain's output: extend that chain
+                chain.ops += (op,)
+                chain_by_output[chain.output] = chain
+                continue
+            chain = _Chain(source=source, ops=(op,))
+        else:
+            items.append(_standalone_job(op))
+            continue
+
+        chain_by_output[chain.output] = chain
+        items.append(chain)
+
+    return _group_chains(items, ops)
+
+
+def _group_chains(items: List[Any], ops: Sequence[Op]) -> List[Job]:
+    """Merge chains reading the same source into multi-output jobs
+
+    A chain only joins a group if everything it reads was recorded before the group's
+    first operation. Anything later may be derived from the group's own outputs, and
+    merging would make the job read what it writes.
+    """
+    position = {handle: i for i, op in enumerate(ops) for handle in op.outputs}
+    groups: Dict[Tuple[str, Any], Tuple[int, List[_Chain]]] = {}
+    ordered: List[Any] = []
+    for item in items:
+        if isinstance(item, _Chain):
+            key = (item.source, item.seek)
+            group = groups.get(key)
+            if group is None or any(position[ref] >= group[0] for ref in item.resources if is_pending(ref)):
+                group = (position[item.ops[0].outputs[0]], [])
+                groups[key] = group
+                ordered.append(group[1])
+            group[1].append(item)
+        else:
+            ordered.append(item)
+
+    jobs = [_chain_job(item) if isinstance(item, list) else item for item in ordered]
+    return _order_by_dependencies(jobs)
+
+
+def _order_by_dependencies(jobs: List[Job]) -> List[Job]:
+    """Order jobs so every job comes after the jobs producing its inputs"""
+    producer = {handle: job for job in jobs for handle in job.outputs}
+    ordered: List[Job] = []
+    done = set()
+
+    def visit(job: Job) -> None:
+        if id(job) in done:
+            return
+        done.add(id(job))
+        for handle in job.dependencies:
+            if handle in producer:
+                visit(producer[handle])
+        ordered.append(job)
+
+    for job in jobs:
+        visit(job)
+    return ordered
+
+
+def _chain_job(chains: List[_Chain]) -> Job:
+    """Build one FFmpeg job running one or more fused chains over a shared source"""
+    source = chains[0].source
+    seek = chains[0].seek
+    extra_inputs = tuple(ref for chain in chains for ref in chain.resources)
+
+    def build(paths: Mapping[str, str], output_paths: Sequence[str]) -> List[str]:
+        argv = []
+        if seek is not None:
+            argv += ["-ss", _num(seek[0]), "-to", _num(seek[1])]
+        argv += ["-i", paths[source]]
+
+        graph = []
+        if len(chains) > 1:
+            graph.append("[0:v]split=" + str(len(chains)) + "".join(f"[s{i}]" for i in range(len(chains))))
+
+        for i, chain in enumerate(chains):
+            filters = []
+            for op in chain.ops:
+                if op.kind in _CHAIN_FILTERS:
+                    expr, resources = _CHAIN_FILTERS[op.kind](op.arguments)
+                    for ref in resources:
+                        expr = expr.replace("{" + ref + "}", _quote(paths[ref]))
+                    filters.append(expr)
+            label_in = f"[s{i}]" if len(chains) > 1 else "[0:v]"
+            graph.append(f"{label_in}{','.join(filters) or 'null'}[v{i}]")
+
+        argv += ["-filter_complex", ";".join(graph)]
+        for i, output_path in enumerate(output_paths):
+            argv += ["-map", f"[v{i}]", "-map", "0:a?", "-c:a", "copy", output_path]
+        return argv
+
+    return Job(
+        ops=tuple(op for chain in chains for op in chain.ops),
+        inputs=(source, *extra_inputs),
+        outputs=tuple(chain.output for chain in chains),
+        output_extensions=("mp4",) * len(chains),
+        build=build
+    )
+
+
+# Transition names the tools accept that FFmpeg's xfade spells differently
+_XFADE_ALIASES = {"wipe": "wipeleft", "slide": "slideleft"}
+
+
+def _standalone_job(op: Op) -> Job:
+    """Build the FFmpeg job for an operation that cannot be fused into a chain"""
+    a = op.arguments
+    kind = op.kind
+
+    def concat(first: str, second: str) -> Tuple[Tuple[str, ...], Callable]:
+        def build(paths, outs):
+            return ["-i", paths[first], "-i", paths[second], "-filter_complex",
+                    "[0:v][0:a][1:v][1:a]concat=n=2:v=1:a=1[v][a]", "-map", "[v]", "-map", "[a]", outs[0]]
+        return (first, second), build
+
+    extension = "mp4"
+    uploads = ()
+    if kind == "split_video":
+        inputs = (a["video_s3_uri"],)
+        split = _num(a["split_time"])
+        build = lambda paths, outs: ["-i", paths[inputs[0]], "-map", "0", "-t", split, "-c", "copy", outs[0],
+                                     "-map", "0", "-ss", split, "-c", "copy", outs[1]]
+    elif kind == "merge_clips":
+        inputs, build = concat(a["clip1_s3_uri"], a["clip2_s3_uri"])
+    elif kind == "add_intro":
+        inputs, build = concat(a["intro_clip_s3_uri"], a["video_s3_uri"])
+    elif kind == "add_outro":
+        inputs, build = concat(a["video_s3_uri"], a["outro_clip_s3_uri"])
+    elif kind == "add_transition":
+        inputs = (a["clip1_s3_uri"], a["clip2_s3_uri"])
+        transition = _XFADE_ALIASES.get(a["transition_type"], a["transition_type"])
+        duration = a["duration"]
+
+        def build(paths, outs):
+            offset = max(probe_duration(paths[inputs[0]]) - duration, 0.0)
+            return ["-i", paths[inputs[0]], "-i", paths[inputs[1]], "-filter_complex",
+                    f"[0:v][1:v]xfade=transition={transition}:duration={_num(duration)}:offset={_num(offset)}[v];"
+                    f"[0:a][1:a]acrossfade=d={_num(duration)}[a]",
+                    "-map", "[v]", "-map", "[a]", outs[0]]
+    elif kind == "add_overlay":
+        inputs = (a["video_s3_uri"], a["overlay_image_s3_uri"])
+        build = lambda paths, outs: ["-i", paths[inputs[0]], "-i", paths[inputs[1]], "-filter_complex",
+                                     f"[0:v][1:v]overlay={a['x']}:{a['y']}[v]",
+                                     "-map", "[v]", "-map", "0:a?", "-c:a", "copy", outs[0]]
+    elif kind == "add_soundtrack":
+        inputs = (a["video_s3_uri"], a["audio_s3_uri"])
+        delay_ms = int(a["start_time"] * 1000)
+        build = lambda paths, outs: ["-i", paths[inputs[0]], "-i", paths[inputs[1]], "-filter_complex",
+                                     f"[1:a]adelay={delay_ms}:all=1[a]", "-map", "0:v", "-map", "[a]",
+                                     "-c:v", "copy", "-shortest", outs[0]]
+    elif kind == "adjust_volume":
+        inputs = (a["video_s3_uri"],)
+        build = lambda paths, outs: ["-i", paths[inputs[0]], "-af", f"volume={_num(a['volume_factor'])}",
+                                     "-c:v", "copy", outs[0]]
+    elif kind == "remove_background_noise":
+        inputs = (a["audio_s3_uri"],)
+        extension = "mp3"
+        build = lambda paths, outs: ["-i", paths[inputs[0]], "-af", "afftdn", outs[0]]
+    elif kind == "generate_thumbnail":
+        inputs = (a["video_s3_uri"],)
+        extension = "png"
+        build = lambda paths, outs: ["-ss", _num(a["timestamp"]), "-i", paths[inputs[0]],
+                                     "-frames:v", "1", outs[0]]
+    elif kind in ("export_video", "change_format"):
+        inputs = (a["video_s3_uri"],)
+        extension = a["output_format"].lstrip(".")
+        build = lambda paths, outs: ["-i", paths[inputs[0]], outs[0]]
+        if kind == "export_video":
+            uploads = ((op.outputs[0], f"{a['output_s3_uri'].rstrip('/')}/exported_video.{extension}"),)
+    else:
+        raise ValueError(f"No FFmpeg mapping for operation: {kind}")
+
+    return Job(
+        ops=(op,),
+        inputs=inputs,
+        outputs=op.outputs,
+        output_extensions=(extension,) * len(op.outputs),
+        build=build,
+        uploads=uploads
+    )
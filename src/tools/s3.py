@@ -0,0 +1,55 @@
+"""
+Shared S3 access for the video editing tools
+
+boto3 comes from the ``s3`` extra and is only imported on first use.
+"""
+
+import functools
+from typing import Any, Tuple
+
+
+S3_SCHEME = "s3://"
+
+# Large objects are fetched as 8 MB parts, 16 in flight at a time
+_MULTIPART_CHUNK = 8 * 1024 * 1024
+_MAX_TRANSFER_CONCURRENCY = 16
+
+
+@functools.lru_cache(maxsize=1)
+def client():
+    """Return the process-wide S3 client, using boto3's default credential chain"""
+    import boto3
+    return boto3.client("s3")
+
+
+@functools.lru_cache(maxsize=1)
+def _transfer_config():
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(
+        multipart_threshold=_MULTIPART_CHUNK,
+        multipart_chunksize=_MULTIPART_CHUNK,
+        max_concurrency=_MAX_TRANSFER_CONCURRENCY
+    )
+
+
+def is_s3_uri(value: Any) -> bool:
+    """Whether a value is an s3:// URI"""
+    return isinstance(value, str) and value.startswith(S3_SCHEME)
+
+
+def split_uri(uri: str) -> Tuple[str, str]:
+    """Split an s3:// URI into bucket and key"""
+    bucket, _, key = uri[len(S3_SCHEME):].partition("/")
+    return bucket, key
+
+
+def download(uri: str, path: str) -> None:
+    """Download a whole object to a local file with parallel ranged GETs"""
+    bucket, key = split_uri(uri)
+    client().download_file(bucket, key, path, Config=_transfer_config())
+
+
+def upload(path: str, uri: str) -> None:
+    """Upload a local file to an S3 URI, in parallel parts when it is large"""
+    bucket, key = split_uri(uri)
+    client().upload_file(path, bucket, key, Config=_transfer_config())
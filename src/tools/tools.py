@@ -1,4 +1,138 @@
-def trim_video(video_s3_uri: str, start_time: float, end_time: float) -> dict:
+import functools
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from src.tools.cache import s3_cached
+from src.tools.plan import deferred
+
+
+# Results of the mock tools are constant, so build each one once at import time and
+# return the same object on every call instead of allocating a fresh dict. They are
+# read-only mappings (with tuple media) so callers can keep or log them without
+# copying. Messages are interned so every result, history entry and log line shares
+# one string object.
+_TRIM_VIDEO_RESULT = MappingProxyType({
+    "message": sys.intern("Video trimmed successfully"),
+    "media": "s3://mock-bucket/output/trimmed_video.mp4"
+})
+
+_SPLIT_VIDEO_RESULT = MappingProxyType({
+    "message": sys.intern("Video split successfully"),
+    "media": (
+        "s3://mock-bucket/output/split_part1.mp4",
+        "s3://mock-bucket/output/split_part2.mp4"
+    )
+})
+
+_MERGE_CLIPS_RESULT = MappingProxyType({
+    "message": sys.intern("Clips merged successfully"),
+    "media": "s3://mock-bucket/output/merged_video.mp4"
+})
+
+_CROP_FRAME_RESULT = MappingProxyType({
+    "message": sys.intern("Video cropped successfully"),
+    "media": "s3://mock-bucket/output/cropped_video.mp4"
+})
+
+_RESIZE_VIDEO_RESULT = MappingProxyType({
+    "message": sys.intern("Video resized successfully"),
+    "media": "s3://mock-bucket/output/resized_video.mp4"
+})
+
+_CHANGE_RESOLUTION_RESULT = MappingProxyType({
+    "message": sys.intern("Video resolution changed successfully"),
+    "media": "s3://mock-bucket/output/resolution_changed_video.mp4"
+})
+
+_ADJUST_FRAME_RATE_RESULT = MappingProxyType({
+    "message": sys.intern("Frame rate adjusted successfully"),
+    "media": "s3://mock-bucket/output/frame_rate_adjusted_video.mp4"
+})
+
+_COLOR_CORRECT_RESULT = MappingProxyType({
+    "message": sys.intern("Color correction applied successfully"),
+    "media": "s3://mock-bucket/output/color_corrected_video.mp4"
+})
+
+_ADD_TRANSITION_RESULT = MappingProxyType({
+    "message": sys.intern("Transition added successfully"),
+    "media": "s3://mock-bucket/output/transition_video.mp4"
+})
+
+_ADD_OVERLAY_RESULT = MappingProxyType({
+    "message": sys.intern("Overlay added successfully"),
+    "media": "s3://mock-bucket/output/overlay_video.mp4"
+})
+
+_ADD_SUBTITLES_RESULT = MappingProxyType({
+    "message": sys.intern("Subtitles added successfully"),
+    "media": "s3://mock-bucket/output/subtitled_video.mp4"
+})
+
+_ADD_CAPTIONS_RESULT = MappingProxyType({
+    "message": sys.intern("Captions added successfully"),
+    "media": "s3://mock-bucket/output/captioned_video.mp4"
+})
+
+_ADD_SOUNDTRACK_RESULT = MappingProxyType({
+    "message": sys.intern("Soundtrack added successfully"),
+    "media": "s3://mock-bucket/output/soundtrack_video.mp4"
+})
+
+_ADJUST_VOLUME_RESULT = MappingProxyType({
+    "message": sys.intern("Volume adjusted successfully"),
+    "media": "s3://mock-bucket/output/volume_adjusted_video.mp4"
+})
+
+_REMOVE_BACKGROUND_NOISE_RESULT = MappingProxyType({
+    "message": sys.intern("Background noise removed successfully"),
+    "media": "s3://mock-bucket/output/cleaned_audio.mp3"
+})
+
+_GENERATE_THUMBNAIL_RESULT = MappingProxyType({
+    "message": sys.intern("Thumbnail generated successfully"),
+    "media": "s3://mock-bucket/output/thumbnail.png"
+})
+
+_ADD_INTRO_RESULT = MappingProxyType({
+    "message": sys.intern("Intro added successfully"),
+    "media": "s3://mock-bucket/output/intro_added_video.mp4"
+})
+
+_ADD_OUTRO_RESULT = MappingProxyType({
+    "message": sys.intern("Outro added successfully"),
+    "media": "s3://mock-bucket/output/outro_added_video.mp4"
+})
+
+
+# Results that depend on the arguments are cached per argument set; they are shared
+# between callers, so they are returned as read-only mappings
+_OUTPUT_PREFIX = sys.intern("s3://mock-bucket/output/")
+_CONVERTED_VIDEO_PREFIX = sys.intern(_OUTPUT_PREFIX + "converted_video.")
+
+
+@functools.lru_cache(maxsize=256)
+def _export_result(output_s3_uri: str, output_format: str) -> MappingProxyType:
+    """Build the export_video result for a destination and format"""
+    return MappingProxyType({
+        "message": sys.intern("Video exported successfully"),
+        "media": output_s3_uri.rstrip("/") + "/exported_video." + output_format
+    })
+
+
+@functools.lru_cache(maxsize=256)
+def _change_format_result(output_format: str) -> MappingProxyType:
+    """Build the change_format result for a format"""
+    return MappingProxyType({
+        "message": sys.intern("Video format changed successfully"),
+        "media": sys.intern(_CONVERTED_VIDEO_PREFIX + output_format)
+    })
+
+
+@s3_cached
+@deferred
+def trim_video(video_s3_uri: str, start_time: float, end_time: float) -> Mapping:
     """
     Trim a video between start_time and end_time.
 
@@ -8,15 +142,13 @@ def trim_video(video_s3_uri: str, start_time: float, end_time: float) -> dict:
         end_time (float): End time in seconds.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the trimmed video.
+        Mapping: Contains a success message and the S3 URI of the trimmed video.
     """
-    return {
-        "message": "Video trimmed successfully",
-        "media": "s3://mock-bucket/output/trimmed_video.mp4"
-    }
+    return _TRIM_VIDEO_RESULT
 
 
-def split_video(video_s3_uri: str, split_time: float) -> dict:
+@deferred(outputs=2)
+def split_video(video_s3_uri: str, split_time: float) -> Mapping:
     """
     Split a video into two clips at a specific time.
 
@@ -25,18 +157,13 @@ def split_video(video_s3_uri: str, split_time: float) -> dict:
         split_time (float): Time in seconds to split the video.
 
     Returns:
-        dict: Contains a success message and a list of S3 URIs of the two resulting clips.
+        Mapping: Contains a success message and the S3 URIs of the two resulting clips.
     """
-    return {
-        "message": "Video split successfully",
-        "media": [
-            "s3://mock-bucket/output/split_part1.mp4",
-            "s3://mock-bucket/output/split_part2.mp4"
-        ]
-    }
+    return _SPLIT_VIDEO_RESULT
 
 
-def merge_clips(clip1_s3_uri: str, clip2_s3_uri: str) -> dict:
+@deferred
+def merge_clips(clip1_s3_uri: str, clip2_s3_uri: str) -> Mapping:
     """
     Merge two video clips sequentially.
 
@@ -45,15 +172,14 @@ def merge_clips(clip1_s3_uri: str, clip2_s3_uri: str) -> dict:
         clip2_s3_uri (str): S3 URI of the second video clip.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the merged video.
+        Mapping: Contains a success message and the S3 URI of the merged video.
     """
-    return {
-        "message": "Clips merged successfully",
-        "media": "s3://mock-bucket/output/merged_video.mp4"
-    }
+    return _MERGE_CLIPS_RESULT
 
 
-def crop_frame(video_s3_uri: str, x: int, y: int, width: int, height: int) -> dict:
+@s3_cached
+@deferred
+def crop_frame(video_s3_uri: str, x: int, y: int, width: int, height: int) -> Mapping:
     """
     Crop a video frame to a specific region.
 
@@ -65,15 +191,14 @@ def crop_frame(video_s3_uri: str, x: int, y: int, width: int, height: int) -> di
         height (int): Height of the cropped area.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the cropped video.
+        Mapping: Contains a success message and the S3 URI of the cropped video.
     """
-    return {
-        "message": "Video cropped successfully",
-        "media": "s3://mock-bucket/output/cropped_video.mp4"
-    }
+    return _CROP_FRAME_RESULT
 
 
-def resize_video(video_s3_uri: str, target_width: int, target_height: int) -> dict:
+@s3_cached
+@deferred
+def resize_video(video_s3_uri: str, target_width: int, target_height: int) -> Mapping:
     """
     Resize a video to the target dimensions.
 
@@ -83,15 +208,14 @@ def resize_video(video_s3_uri: str, target_width: int, target_height: int) -> di
         target_height (int): Desired height in pixels.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the resized video.
+        Mapping: Contains a success message and the S3 URI of the resized video.
     """
-    return {
-        "message": "Video resized successfully",
-        "media": "s3://mock-bucket/output/resized_video.mp4"
-    }
+    return _RESIZE_VIDEO_RESULT
 
 
-def change_resolution(video_s3_uri: str, width: int, height: int) -> dict:
+@s3_cached
+@deferred
+def change_resolution(video_s3_uri: str, width: int, height: int) -> Mapping:
     """
     Change the resolution of a video.
 
@@ -101,15 +225,14 @@ def change_resolution(video_s3_uri: str, width: int, height: int) -> dict:
         height (int): Target height in pixels.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with new resolution.
+        Mapping: Contains a success message and the S3 URI of the video with new resolution.
     """
-    return {
-        "message": "Video resolution changed successfully",
-        "media": "s3://mock-bucket/output/resolution_changed_video.mp4"
-    }
+    return _CHANGE_RESOLUTION_RESULT
 
 
-def adjust_frame_rate(video_s3_uri: str, target_fps: int) -> dict:
+@s3_cached
+@deferred
+def adjust_frame_rate(video_s3_uri: str, target_fps: int) -> Mapping:
     """
     Adjust the frame rate of a video.
 
@@ -118,15 +241,14 @@ def adjust_frame_rate(video_s3_uri: str, target_fps: int) -> dict:
         target_fps (int): Desired frames per second.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the frame rate-adjusted video.
+        Mapping: Contains a success message and the S3 URI of the frame rate-adjusted video.
     """
-    return {
-        "message": "Frame rate adjusted successfully",
-        "media": "s3://mock-bucket/output/frame_rate_adjusted_video.mp4"
-    }
+    return _ADJUST_FRAME_RATE_RESULT
 
 
-def color_correct(video_s3_uri: str, brightness: float = 1.0, contrast: float = 1.0, saturation: float = 1.0) -> dict:
+@s3_cached
+@deferred
+def color_correct(video_s3_uri: str, brightness: float = 1.0, contrast: float = 1.0, saturation: float = 1.0) -> Mapping:
     """
     Apply basic color correction to a video.
 
@@ -137,15 +259,13 @@ def color_correct(video_s3_uri: str, brightness: float = 1.0, contrast: float =
         saturation (float): Saturation factor (default 1.0 = no change).
 
     Returns:
-        dict: Contains a success message and the S3 URI of the color-corrected video.
+        Mapping: Contains a success message and the S3 URI of the color-corrected video.
     """
-    return {
-        "message": "Color correction applied successfully",
-        "media": "s3://mock-bucket/output/color_corrected_video.mp4"
-    }
+    return _COLOR_CORRECT_RESULT
 
 
-def add_transition(clip1_s3_uri: str, clip2_s3_uri: str, transition_type: str, duration: float) -> dict:
+@deferred
+def add_transition(clip1_s3_uri: str, clip2_s3_uri: str, transition_type: str, duration: float) -> Mapping:
     """
     Add a transition effect between two video clips.
 
@@ -156,15 +276,14 @@ def add_transition(clip1_s3_uri: str, clip2_s3_uri: str, transition_type: str, d
         duration (float): Duration of the transition in seconds.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with transition applied.
+        Mapping: Contains a success message and the S3 URI of the video with transition applied.
     """
-    return {
-        "message": "Transition added successfully",
-        "media": "s3://mock-bucket/output/transition_video.mp4"
-    }
+    return _ADD_TRANSITION_RESULT
 
 
-def add_overlay(video_s3_uri: str, overlay_image_s3_uri: str, x: int, y: int) -> dict:
+@s3_cached
+@deferred
+def add_overlay(video_s3_uri: str, overlay_image_s3_uri: str, x: int, y: int) -> Mapping:
     """
     Overlay an image on top of a video.
 
@@ -175,15 +294,14 @@ def add_overlay(video_s3_uri: str, overlay_image_s3_uri: str, x: int, y: int) ->
         y (int): Y coordinate position of the overlay.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with overlay applied.
+        Mapping: Contains a success message and the S3 URI of the video with overlay applied.
     """
-    return {
-        "message": "Overlay added successfully",
-        "media": "s3://mock-bucket/output/overlay_video.mp4"
-    }
+    return _ADD_OVERLAY_RESULT
 
 
-def add_subtitles(video_s3_uri: str, subtitles_s3_uri: str) -> dict:
+@s3_cached
+@deferred
+def add_subtitles(video_s3_uri: str, subtitles_s3_uri: str) -> Mapping:
     """
     Add subtitles to a video.
 
@@ -192,15 +310,14 @@ def add_subtitles(video_s3_uri: str, subtitles_s3_uri: str) -> dict:
         subtitles_s3_uri (str): S3 URI of the subtitle file (.srt or .vtt).
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with subtitles added.
+        Mapping: Contains a success message and the S3 URI of the video with subtitles added.
     """
-    return {
-        "message": "Subtitles added successfully",
-        "media": "s3://mock-bucket/output/subtitled_video.mp4"
-    }
+    return _ADD_SUBTITLES_RESULT
 
 
-def add_captions(video_s3_uri: str, text: str, start_time: float, end_time: float, x: int, y: int) -> dict:
+@s3_cached
+@deferred
+def add_captions(video_s3_uri: str, text: str, start_time: float, end_time: float, x: int, y: int) -> Mapping:
     """
     Add custom captions as text on the video.
 
@@ -213,15 +330,13 @@ def add_captions(video_s3_uri: str, text: str, start_time: float, end_time: floa
         y (int): Y coordinate position of the text.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with captions added.
+        Mapping: Contains a success message and the S3 URI of the video with captions added.
     """
-    return {
-        "message": "Captions added successfully",
-        "media": "s3://mock-bucket/output/captioned_video.mp4"
-    }
+    return _ADD_CAPTIONS_RESULT
 
 
-def add_soundtrack(video_s3_uri: str, audio_s3_uri: str, start_time: float = 0.0) -> dict:
+@deferred
+def add_soundtrack(video_s3_uri: str, audio_s3_uri: str, start_time: float = 0.0) -> Mapping:
     """
     Add a soundtrack to a video.
 
@@ -231,15 +346,13 @@ def add_soundtrack(video_s3_uri: str, audio_s3_uri: str, start_time: float = 0.0
         start_time (float): Start time in seconds for the audio (default 0.0).
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with soundtrack added.
+        Mapping: Contains a success message and the S3 URI of the video with soundtrack added.
     """
-    return {
-        "message": "Soundtrack added successfully",
-        "media": "s3://mock-bucket/output/soundtrack_video.mp4"
-    }
+    return _ADD_SOUNDTRACK_RESULT
 
 
-def adjust_volume(video_s3_uri: str, volume_factor: float) -> dict:
+@deferred
+def adjust_volume(video_s3_uri: str, volume_factor: float) -> Mapping:
     """
     Adjust the volume of a video's audio track.
 
@@ -248,15 +361,13 @@ def adjust_volume(video_s3_uri: str, volume_factor: float) -> dict:
         volume_factor (float): Volume multiplier (1.0 = no change, 0.5 = half volume, 2.0 = double volume).
 
     Returns:
-        dict: Contains a success message and the S3 URI of the volume-adjusted video.
+        Mapping: Contains a success message and the S3 URI of the volume-adjusted video.
     """
-    return {
-        "message": "Volume adjusted successfully",
-        "media": "s3://mock-bucket/output/volume_adjusted_video.mp4"
-    }
+    return _ADJUST_VOLUME_RESULT
 
 
-def remove_background_noise(audio_s3_uri: str) -> dict:
+@deferred
+def remove_background_noise(audio_s3_uri: str) -> Mapping:
     """
     Remove background noise from an audio file.
 
@@ -264,15 +375,14 @@ def remove_background_noise(audio_s3_uri: str) -> dict:
         audio_s3_uri (str): S3 URI of the input audio.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the cleaned audio.
+        Mapping: Contains a success message and the S3 URI of the cleaned audio.
     """
-    return {
-        "message": "Background noise removed successfully",
-        "media": "s3://mock-bucket/output/cleaned_audio.mp3"
-    }
+    return _REMOVE_BACKGROUND_NOISE_RESULT
 
 
-def generate_thumbnail(video_s3_uri: str, timestamp: float) -> dict:
+@s3_cached
+@deferred
+def generate_thumbnail(video_s3_uri: str, timestamp: float) -> Mapping:
     """
     Generate a thumbnail image from a video at a specific timestamp.
 
@@ -281,15 +391,13 @@ def generate_thumbnail(video_s3_uri: str, timestamp: float) -> dict:
         timestamp (float): Time in seconds to capture the thumbnail.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the generated thumbnail.
+        Mapping: Contains a success message and the S3 URI of the generated thumbnail.
     """
-    return {
-        "message": "Thumbnail generated successfully",
-        "media": "s3://mock-bucket/output/thumbnail.png"
-    }
+    return _GENERATE_THUMBNAIL_RESULT
 
 
-def add_intro(video_s3_uri: str, intro_clip_s3_uri: str) -> dict:
+@deferred
+def add_intro(video_s3_uri: str, intro_clip_s3_uri: str) -> Mapping:
     """
     Add an intro clip before the main video.
 
@@ -298,15 +406,13 @@ def add_intro(video_s3_uri: str, intro_clip_s3_uri: str) -> dict:
         intro_clip_s3_uri (str): S3 URI of the intro video.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with intro added.
+        Mapping: Contains a success message and the S3 URI of the video with intro added.
     """
-    return {
-        "message": "Intro added successfully",
-        "media": "s3://mock-bucket/output/intro_added_video.mp4"
-    }
+    return _ADD_INTRO_RESULT
 
 
-def add_outro(video_s3_uri: str, outro_clip_s3_uri: str) -> dict:
+@deferred
+def add_outro(video_s3_uri: str, outro_clip_s3_uri: str) -> Mapping:
     """
     Add an outro clip after the main video.
 
@@ -315,15 +421,13 @@ def add_outro(video_s3_uri: str, outro_clip_s3_uri: str) -> dict:
         outro_clip_s3_uri (str): S3 URI of the outro video.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the video with outro added.
+        Mapping: Contains a success message and the S3 URI of the video with outro added.
     """
-    return {
-        "message": "Outro added successfully",
-        "media": "s3://mock-bucket/output/outro_added_video.mp4"
-    }
+    return _ADD_OUTRO_RESULT
 
 
-def export_video(video_s3_uri: str, output_format: str, output_s3_uri: str) -> dict:
+@deferred
+def export_video(video_s3_uri: str, output_format: str, output_s3_uri: str) -> Mapping:
     """
     Export a video to a given format and location.
 
@@ -333,15 +437,14 @@ def export_video(video_s3_uri: str, output_format: str, output_s3_uri: str) -> d
         output_s3_uri (str): Destination S3 URI for the exported video.
 
     Returns:
-        dict: Contains a success message and the S3 URI of the exported video.
+        Mapping: Contains a success message and the S3 URI of the exported video.
     """
-    return {
-        "message": "Video exported successfully",
-        "media": f"{output_s3_uri.rstrip('/')}/exported_video.{output_format}"
-    }
+    return _export_result(output_s3_uri, output_format)
 
 
-def change_format(video_s3_uri: str, output_format: str) -> dict:
+@s3_cached
+@deferred
+def change_format(video_s3_uri: str, output_format: str) -> Mapping:
     """
     Change the format of a video file.
 
@@ -350,9 +453,32 @@ def change_format(video_s3_uri: str, output_format: str) -> dict:
         output_format (str): Desired format (e.g., "mp4", "avi", "mov").
 
     Returns:
-        dict: Contains a success message and the S3 URI of the converted video.
-    """
-    return {
-        "message": "Video format changed successfully",
-        "media": f"s3://mock-bucket/output/converted_video.{output_format}"
-    }
+        Mapping: Contains a success message and the S3 URI of the converted video.
+    """
+    return _change_format_result(output_format)
+
+
+# Every tool, in the order they are offered to the model. This is the one list
+# consumers iterate; add new tools here.
+TOOLS = (
+    trim_video,
+    split_video,
+    merge_clips,
+    crop_frame,
+    resize_video,
+    change_resolution,
+    adjust_frame_rate,
+    color_correct,
+    add_transition,
+    add_overlay,
+    add_subtitles,
+    add_captions,
+    add_soundtrack,
+    adjust_volume,
+    remove_background_noise,
+    generate_thumbnail,
+    add_intro,
+    add_outro,
+    export_video,
+    change_format,
+)
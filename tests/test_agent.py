@@ -2,8 +2,23 @@
 Test script to verify the video editing agent works correctly
 """
 
+import asyncio
+import json
 import os
-from src.agents.video_agent import create_video_editing_agent
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from src.agents.video_agent import _build_static_agent_state, create_video_editing_agent
+from src.tools import plan as plan_module
+
+
+# Names of every tool the agent is expected to register
+_EXPECTED_TOOLS = frozenset({
+    "trim_video", "split_video", "merge_clips", "crop_frame",
+    "resize_video", "change_resolution", "adjust_frame_rate",
+    "color_correct", "add_transition", "add_overlay", "add_subtitles",
+    "add_captions", "add_soundtrack", "adjust_volume",
+    "remove_background_noise", "generate_thumbnail", "add_intro",
+    "add_outro", "export_video", "change_format"
+})
 
 
 def test_agent_initialization():
@@ -25,21 +40,12 @@ def test_agent_initialization():
             print(f"  {i}. {tool.name}")
         
         # Test tool registration
-        expected_tools = [
-            "trim_video", "split_video", "merge_clips", "crop_frame",
-            "resize_video", "change_resolution", "adjust_frame_rate",
-            "color_correct", "add_transition", "add_overlay", "add_subtitles",
-            "add_captions", "add_soundtrack", "adjust_volume",
-            "remove_background_noise", "generate_thumbnail", "add_intro",
-            "add_outro", "export_video", "change_format"
-        ]
-        
-        registered_tool_names = [tool.name for tool in agent.tools]
+        registered = frozenset(tool.name for tool in agent.tools)
         
-        print(f"\n📋 Expected tools: {len(expected_tools)}")
-        print(f"📋 Registered tools: {len(registered_tool_names)}")
+        print(f"\n📋 Expected tools: {len(_EXPECTED_TOOLS)}")
+        print(f"📋 Registered tools: {len(registered)}")
         
-        missing_tools = set(expected_tools) - set(registered_tool_names)
+        missing_tools = _EXPECTED_TOOLS - registered
         if missing_tools:
             print(f"⚠️  Missing tools: {missing_tools}")
         else:
@@ -60,5 +66,166 @@ def test_agent_initialization():
     return True
 
 
+def test_parallel_tool_execution():
+    """Test that every tool call in a turn gets its own ToolMessage, failures included"""
+    agent = create_video_editing_agent("test-key-12345")
+    
+    last_message = AIMessage(content="", tool_calls=[
+        {"name": "trim_video", "args": {"video_s3_uri": "s3://bucket/in.mp4", "start_time": 1.0, "end_time": 2.0}, "id": "call_1"},
+        {"name": "generate_thumbnail", "args": {"video_s3_uri": "s3://bucket/in.mp4", "timestamp": 5.0}, "id": "call_2"},
+        {"name": "not_a_tool", "args": {}, "id": "call_3"},
+    ])
+    
+    result = asyncio.run(agent._aexecute_tools({"messages": [last_message]}, {}))
+    tool_messages = result["messages"]
+    
+    assert all(isinstance(msg, ToolMessage) for msg in tool_messages)
+    assert [msg.tool_call_id for msg in tool_messages] == ["call_1", "call_2", "call_3"]
+    assert "trimmed_video.mp4" in tool_messages[0].content
+    assert "thumbnail.png" in tool_messages[1].content
+    assert tool_messages[2].status == "error"
+    print("✅ Parallel tool execution works!")
+
+
+def test_agents_share_static_state():
+    """Test that tool registration happens once and later agents reuse it"""
+    static = _build_static_agent_state()
+    first = create_video_editing_agent("test-key-12345")
+    second = create_video_editing_agent("test-key-67890")
+    
+    assert isinstance(first.tools, tuple)
+    assert first.tools is static.tools and second.tools is static.tools
+    assert len(static.tool_schemas) == len(_EXPECTED_TOOLS)
+    print("✅ Agents share one tool registration!")
+
+
+class _StubLLM:
+    """Tool-bound LLM stand-in that records every call"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def ainvoke(self, messages):
+        self.calls.append(messages)
+        reply = f"reply {len(self.calls)}"
+        # Stay in flight long enough for the tools to finish and cancel us
+        await asyncio.sleep(0.05)
+        return AIMessage(content=reply)
+
+
+def test_speculative_planning():
+    """Test that speculative LLM calls are reused on matching predictions and cancelled otherwise"""
+    agent = create_video_editing_agent("test-key-12345", speculative=True)
+    llm = agent.llm_with_tools = _StubLLM()
+    config = {"configurable": {"thread_id": "spec"}}
+    args = {"video_s3_uri": "s3://bucket/in.mp4", "start_time": 1.0, "end_time": 2.0}
+    history = [HumanMessage(content="Trim my video")]
+    
+    started = []
+    start_speculation = agent._start_speculation
+    agent._start_speculation = lambda *a: started.append(start_speculation(*a)) or started[-1]
+    
+    def turn(call_id):
+        call = AIMessage(content="", tool_calls=[{"name": "trim_video", "args": args, "id": call_id}])
+        return {"messages": history + [call], "current_video_uri": "s3://bucket/in.mp4"}
+    
+    async def run():
+        # Nothing has been seen yet, so there is nothing to predict
+        await agent._aexecute_tools(turn("call_1"), config)
+        assert started == [None]
+        
+        # The repeated call is predicted correctly; the next turn reuses that LLM call
+        state = turn("call_2")
+        result = await agent._aexecute_tools(state, config)
+        assert agent._speculations["spec"][0] == "call_2"
+        response = await agent._acall_agent({**state, "messages": state["messages"] + result["messages"]}, config)
+        assert len(llm.calls) == 1 and response["messages"][0].content == "reply 1"
+        
+        # A wrong prediction cancels the speculative call
+        agent._predicted_tool_results = {key: "stale" for key in agent._predicted_tool_results}
+        await agent._aexecute_tools(turn("call_3"), config)
+        await asyncio.sleep(0)
+        assert started[-1][1].cancelled() and "spec" not in agent._speculations
+        
+        # A newer matching speculation replaces, and cancels, one that was never taken
+        await agent._aexecute_tools(turn("call_4"), config)
+        stale_task = agent._speculations["spec"][1]
+        await agent._aexecute_tools(turn("call_5"), config)
+        await asyncio.sleep(0)
+        assert stale_task.cancelled() and agent._speculations["spec"][0] == "call_5"
+        
+        # A speculation that doesn't follow the current state is cancelled, not used
+        task = agent._speculations["spec"][1]
+        calls_before = len(llm.calls)
+        await agent._acall_agent({"messages": history, "current_video_uri": "s3://bucket/in.mp4"}, config)
+        await asyncio.sleep(0)
+        assert task.cancelled() and len(llm.calls) == calls_before + 1
+    
+    asyncio.run(run())
+    print("✅ Speculative planning works!")
+
+
+class _ScriptedLLM:
+    """Tool-bound LLM stand-in that replays a fixed list of replies"""
+    
+    def __init__(self, replies):
+        self.replies = list(replies)
+    
+    async def ainvoke(self, messages):
+        return self.replies.pop(0)
+
+
+def test_deferred_request_runs_one_plan():
+    """Test that a deferred agent plans a request's tool calls and runs them once it has finished"""
+    agent = create_video_editing_agent("test-key-12345", deferred=True)
+    agent.llm_with_tools = _ScriptedLLM([
+        AIMessage(content="", tool_calls=[
+            {"name": "trim_video", "args": {"video_s3_uri": "in.mp4", "start_time": 0.0, "end_time": 2.0}, "id": "call_1"},
+        ]),
+        AIMessage(content="Trimmed"),
+    ])
+    
+    calls = []
+    original = plan_module.run_ffmpeg
+    plan_module.run_ffmpeg = calls.append
+    try:
+        result = asyncio.run(agent.aprocess_request("Trim the first two seconds", video_uri="in.mp4"))
+    finally:
+        plan_module.run_ffmpeg = original
+    
+    handle = json.loads(result["messages"][2].content)["media"]
+    assert result["success"] and result["final_output"] == "Trimmed"
+    assert handle.startswith("pending://") and list(result["outputs"]) == [handle]
+    assert len(calls) == 1
+    print("✅ Deferred requests run one plan!")
+
+
+def test_streamed_tool_events_are_json():
+    """Test that tool_end events carry JSON-serializable results"""
+    agent = create_video_editing_agent("test-key-12345")
+    agent.llm_with_tools = _ScriptedLLM([
+        AIMessage(content="", tool_calls=[
+            {"name": "trim_video", "args": {"video_s3_uri": "s3://bucket/in.mp4", "start_time": 0.0, "end_time": 2.0}, "id": "call_1"},
+        ]),
+        AIMessage(content="Trimmed"),
+    ])
+    
+    async def run():
+        return [event async for event in agent.astream_request("Trim the first two seconds",
+                                                               video_uri="s3://bucket/in.mp4")]
+    
+    events = asyncio.run(run())
+    tool_end = next(event for event in events if event["type"] == "tool_end")
+    decoded = json.loads(json.dumps(tool_end))
+    assert json.loads(decoded["data"])["media"] == "s3://mock-bucket/output/trimmed_video.mp4"
+    assert events[-1]["data"]["final_output"] == "Trimmed"
+    print("✅ Streamed tool events serialize to JSON!")
+
+
 if __name__ == "__main__":
     test_agent_initialization()
+    test_parallel_tool_execution()
+    test_agents_share_static_state()
+    test_speculative_planning()
+    test_deferred_request_runs_one_plan()
+    test_streamed_tool_events_are_json()
@@ -0,0 +1,131 @@
+"""
+Test script to verify the S3 artifact cache serves and invalidates results correctly
+"""
+
+import contextlib
+from types import MappingProxyType
+from src.tools import cache, s3
+from src.tools.plan import deferred, flush_plan, planning
+
+
+class _StubS3:
+    """Minimal S3 client answering HEAD requests from a dict of URI -> ETag"""
+
+    class exceptions:
+        class ClientError(Exception):
+            def __init__(self, code):
+                super().__init__(code)
+                self.response = {"Error": {"Code": code}}
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.heads = []
+
+    def head_object(self, Bucket, Key):
+        uri = f"s3://{Bucket}/{Key}"
+        self.heads.append(uri)
+        if uri not in self.objects:
+            raise self.exceptions.ClientError("404")
+        return {"ETag": self.objects[uri]}
+
+
+@contextlib.contextmanager
+def _stubbed(objects):
+    """Point the cache at a stubbed client and bucket, forgetting earlier lookups
+
+    Yields the stub, the calls that reached the tool and a cached, plannable resize tool.
+    """
+    stub = _StubS3(objects)
+    calls = []
+
+    def resize_video(video_s3_uri: str, target_width: int, target_height: int) -> dict:
+        calls.append(video_s3_uri)
+        return {"message": "Video resized successfully", "media": "s3://out/resized.mp4"}
+
+    original_client, original_bucket = s3.client, cache.CACHE_BUCKET
+    s3.client, cache.CACHE_BUCKET = (lambda: stub), "cb"
+    cache._source_etags.clear()
+    cache._artifact_etag.cache_clear()
+    try:
+        yield stub, calls, cache.s3_cached(deferred(resize_video))
+    finally:
+        s3.client, cache.CACHE_BUCKET = original_client, original_bucket
+
+
+def test_miss_runs_the_tool():
+    """Test that a call with no cached artifact runs the tool"""
+    with _stubbed({"s3://src/in.mp4": "etag1"}) as (stub, calls, resize):
+        result = resize("s3://src/in.mp4", 640, 360)
+        assert result["media"] == "s3://out/resized.mp4"
+        assert calls == ["s3://src/in.mp4"]
+
+
+def test_hit_skips_the_tool():
+    """Test that an existing artifact is returned without running the tool"""
+    with _stubbed({"s3://src/in.mp4": "etag1"}) as (stub, calls, resize):
+        key = cache.cache_uri("resize_video", {"video_s3_uri": "s3://src/in.mp4", "target_width": 640, "target_height": 360})
+        stub.objects[key] = "artifact"
+
+        result = resize("s3://src/in.mp4", 640, 360)
+        assert result["media"] == key and key.startswith("s3://cb/resize_video/")
+        assert isinstance(result, MappingProxyType)
+        assert calls == []
+
+
+def test_non_s3_arguments_are_not_cached():
+    """Test that calls on pending handles or local paths bypass the cache"""
+    with _stubbed({}) as (stub, calls, resize):
+        assert cache.cache_uri("resize_video", {"video_s3_uri": "pending://op_1"}) is None
+        resize("/tmp/in.mp4", 640, 360)
+        assert calls == ["/tmp/in.mp4"] and stub.heads == []
+
+
+def test_changed_source_misses():
+    """Test that overwriting a source changes the key once its ETag is re-read"""
+    with _stubbed({"s3://src/in.mp4": "etag1"}) as (stub, calls, resize):
+        args = {"video_s3_uri": "s3://src/in.mp4", "target_width": 640, "target_height": 360}
+        old_key = cache.cache_uri("resize_video", args)
+        stub.objects[old_key] = "artifact"
+
+        # Within the TTL the source is not HEADed again
+        heads = len(stub.heads)
+        assert cache.cache_uri("resize_video", args) == old_key
+        assert len(stub.heads) == heads
+
+        stub.objects["s3://src/in.mp4"] = "etag2"
+        cache._source_etags.clear()  # as if the TTL had passed
+        assert cache.cache_uri("resize_video", args) != old_key
+        resize("s3://src/in.mp4", 640, 360)
+        assert calls == ["s3://src/in.mp4"]
+
+
+def test_flushed_output_is_a_hit_next_time():
+    """Test that flushing a plan writes a cacheable tool's output back to its cache key"""
+    with _stubbed({"s3://src/in.mp4": "etag1"}) as (stub, calls, resize):
+        uploads = []
+
+        def upload(path, uri):
+            uploads.append(uri)
+            stub.objects[uri] = "artifact"
+
+        with planning():
+            resize("s3://src/in.mp4", 640, 360)
+            flush_plan(workdir="/work", runner=lambda argv: None,
+                       download=lambda uri, path: None, upload=upload)
+
+        key = cache.cache_uri("resize_video", {"video_s3_uri": "s3://src/in.mp4", "target_width": 640, "target_height": 360})
+        assert uploads == [key]
+
+        result = resize("s3://src/in.mp4", 640, 360)
+        assert result["media"] == key and calls == []
+
+
+if __name__ == "__main__":
+    print("🧪 Testing S3 Artifact Cache")
+    print("=" * 50)
+    test_miss_runs_the_tool()
+    test_hit_skips_the_tool()
+    test_non_s3_arguments_are_not_cached()
+    test_changed_source_misses()
+    test_flushed_output_is_a_hit_next_time()
+    print("✅ All cache tests passed")
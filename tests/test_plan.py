@@ -0,0 +1,194 @@
+"""
+Test script to verify tool calls are planned and fused into FFmpeg jobs correctly
+"""
+
+import asyncio
+import os
+import threading
+from types import MappingProxyType
+from src.tools import tools
+from src.tools.plan import FFMPEG_THREADS, Job, aflush_plan, compile_plan, flush_plan, planning
+from src.tools import plan as plan_module
+
+
+def test_tools_run_immediately_outside_a_plan():
+    """Test that tools keep returning their results when no plan is active"""
+    result = tools.trim_video("s3://bucket/in.mp4", 0.0, 10.0)
+    assert result["media"] == "s3://mock-bucket/output/trimmed_video.mp4"
+    assert isinstance(tools.split_video("s3://bucket/in.mp4", 3.0)["media"], tuple)
+    try:
+        result["media"] = "s3://elsewhere/out.mp4"
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("shared tool results must be read-only")
+
+
+def test_chain_is_fused_into_one_job():
+    """Test that trim -> resize -> color_correct -> add_subtitles compiles to one FFmpeg call"""
+    with planning() as plan:
+        trimmed = tools.trim_video("in.mp4", 5.0, 15.0)
+        assert trimmed["media"].startswith("pending://")
+        assert isinstance(trimmed, MappingProxyType)
+        resized = tools.resize_video(trimmed["media"], 1280, 720)
+        corrected = tools.color_correct(resized["media"], brightness=1.2, contrast=1.1)
+        final = tools.add_subtitles(corrected["media"], "subs.srt")
+        jobs = compile_plan(plan)
+
+    assert len(jobs) == 1
+    job = jobs[0]
+    assert job.outputs == (final["media"],)
+    assert set(job.inputs) == {"in.mp4", "subs.srt"}
+
+    argv = job.build({"in.mp4": "/stage/in.mp4", "subs.srt": "/stage/subs.srt"}, ["/out/final.mp4"])
+    assert argv[:6] == ["-ss", "5", "-to", "15", "-i", "/stage/in.mp4"]
+    graph = argv[argv.index("-filter_complex") + 1]
+    assert graph == "[0:v]scale=1280:720,eq=brightness=0.2:contrast=1.1:saturation=1,subtitles='/stage/subs.srt'[v0]"
+    assert argv[-1] == "/out/final.mp4"
+    print("✅ Chain fused into one job")
+
+
+def test_chains_on_same_source_share_one_decode():
+    """Test that independent chains over one source become a single multi-output job"""
+    with planning() as plan:
+        small = tools.resize_video("in.mp4", 640, 360)
+        graded = tools.color_correct("in.mp4", saturation=1.5)
+        jobs = compile_plan(plan)
+
+    assert len(jobs) == 1
+    assert jobs[0].outputs == (small["media"], graded["media"])
+
+    argv = jobs[0].build({"in.mp4": "in.mp4"}, ["a.mp4", "b.mp4"])
+    graph = argv[argv.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]split=2[s0][s1];[s0]scale=640:360[v0];[s1]eq=")
+    assert argv.count("-map") == 4
+
+
+def test_shared_intermediate_is_not_fused():
+    """Test that an output read by two operations is materialized and both readers run after it"""
+    with planning() as plan:
+        trimmed = tools.trim_video("in.mp4", 0.0, 4.0)
+        tools.resize_video(trimmed["media"], 640, 360)
+        tools.generate_thumbnail(trimmed["media"], 1.0)
+        jobs = compile_plan(plan)
+
+    assert jobs[0].outputs == (trimmed["media"],)
+    assert all(trimmed["media"] in job.dependencies for job in jobs[1:])
+    assert len(jobs) == 3
+
+
+def test_chain_reading_a_sibling_output_gets_its_own_job():
+    """Test that a chain using another chain's output over the same source is not merged into it"""
+    with planning() as plan:
+        resized = tools.resize_video("in.mp4", 640, 360)
+        subtitled = tools.add_subtitles("in.mp4", resized["media"])
+        jobs = compile_plan(plan)
+
+    assert [job.outputs for job in jobs] == [(resized["media"],), (subtitled["media"],)]
+    assert all(not set(job.inputs) & set(job.outputs) for job in jobs)
+
+
+def test_flush_plan_runs_jobs_in_order():
+    """Test that flush_plan resolves pending handles to the paths earlier jobs wrote"""
+    calls = []
+    with planning():
+        first = tools.split_video("in.mp4", 3.0)
+        merged = tools.merge_clips(first["media"][1], first["media"][0])
+        paths = flush_plan(workdir="/work", runner=calls.append)
+
+    assert len(calls) == 2
+    assert paths[merged["media"]].startswith("/work/")
+    assert paths[first["media"][1]] in calls[1] and paths[first["media"][0]] in calls[1]
+
+
+def test_export_is_uploaded_to_its_destination():
+    """Test that export_video delivers its output to output_s3_uri"""
+    uploads = []
+    with planning():
+        trimmed = tools.trim_video("in.mp4", 0.0, 2.0)
+        resized = tools.resize_video(trimmed["media"], 640, 360)
+        exported = tools.export_video(resized["media"], "mov", "s3://out-bucket/final/")
+        paths = flush_plan(workdir="/work", runner=lambda argv: None,
+                           upload=lambda path, uri: uploads.append((path, uri)))
+
+    assert uploads == [(paths[exported["media"]], "s3://out-bucket/final/exported_video.mov")]
+    # The trim was fused into the resize and never written on its own
+    assert trimmed["media"] not in paths
+
+
+def test_independent_jobs_run_in_parallel():
+    """Test that jobs with no data dependency are dispatched together"""
+    both_running = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def runner(argv):
+        calls.append(argv)
+        both_running.wait()
+
+    async def run():
+        with planning():
+            tools.generate_thumbnail("in.mp4", 5.0)
+            tools.remove_background_noise("voice.mp3")
+            return await aflush_plan(workdir="/work", runner=runner, max_workers=2)
+
+    paths = asyncio.run(run())
+    assert len(paths) == 2
+    assert all(argv[argv.index("-threads") + 1] == str(FFMPEG_THREADS) for argv in calls)
+
+
+def test_s3_inputs_are_staged_once():
+    """Test that an S3 source read by several jobs is downloaded once and cleaned up"""
+    downloads = []
+    calls = []
+
+    def download(uri, path):
+        downloads.append((uri, path))
+        open(path, "w").close()
+
+    with planning():
+        tools.generate_thumbnail("s3://bucket/in.mp4", 1.0)
+        tools.adjust_volume("s3://bucket/in.mp4", 0.5)
+        flush_plan(workdir="/work", runner=calls.append, download=download)
+
+    assert len(downloads) == 1
+    uri, staged = downloads[0]
+    assert all(staged in argv and uri not in argv for argv in calls)
+    assert not os.path.exists(staged)
+
+
+def test_unschedulable_plan_raises():
+    """Test that jobs waiting on each other fail fast instead of spinning"""
+    build = lambda paths, outs: []
+    cycle = [
+        Job(ops=(), inputs=("pending://b",), outputs=("pending://a",), output_extensions=("mp4",), build=build),
+        Job(ops=(), inputs=("pending://a",), outputs=("pending://b",), output_extensions=("mp4",), build=build),
+    ]
+    original = plan_module.compile_plan
+    plan_module.compile_plan = lambda ops: cycle
+    try:
+        for flush in (lambda: flush_plan(runner=print), lambda: asyncio.run(aflush_plan(runner=print))):
+            with planning():
+                try:
+                    flush()
+                except RuntimeError:
+                    pass
+                else:
+                    raise AssertionError("expected RuntimeError for a cyclic plan")
+    finally:
+        plan_module.compile_plan = original
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Tool Planning")
+    print("=" * 50)
+    test_tools_run_immediately_outside_a_plan()
+    test_chain_is_fused_into_one_job()
+    test_chains_on_same_source_share_one_decode()
+    test_shared_intermediate_is_not_fused()
+    test_chain_reading_a_sibling_output_gets_its_own_job()
+    test_flush_plan_runs_jobs_in_order()
+    test_export_is_uploaded_to_its_destination()
+    test_independent_jobs_run_in_parallel()
+    test_s3_inputs_are_staged_once()
+    test_unschedulable_plan_raises()
+    print("✅ All planning tests passed")